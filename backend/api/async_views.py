@@ -0,0 +1,177 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import (DEFAULT_DB_ALIAS, close_old_connections, connection,
+                       connections)
+
+from asgiref.sync import sync_to_async
+
+from .middleware import install_query_recorder
+
+# Сколько байт потокового ответа читается в пуле за одно обращение.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_VIEWS_THREADS,
+            thread_name_prefix='api-views',
+        )
+    return _executor
+
+
+class PooledStream:
+    """Потоковое содержимое ответа, которое читается порциями в пуле.
+
+    Каждая порция до STREAM_CHUNK_SIZE байт вычитывается отдельным
+    вызовом read() в пуле: весь ответ в памяти не держится, а медленный
+    клиент не занимает поток между порциями. Итератор может читать из
+    базы, поэтому за ответом закреплено соединение, в котором он создан:
+    на время чтения оно подставляется в поток пула и закрывается в
+    close().
+    """
+
+    def __init__(self, response, db_connection):
+        self.response = response
+        self.connection = db_connection
+        self.connection.inc_thread_sharing()
+        self.iterator = None
+        pooled = functools.partial(
+            sync_to_async, thread_sensitive=False, executor=get_executor()
+        )
+        # Пустая порция означает конец содержимого, после ответа или
+        # ошибки вызывается close().
+        self.read = pooled(functools.partial(self.run, self.read_chunk))
+        self.close = pooled(functools.partial(self.run, self.close_response))
+
+    def run(self, method):
+        previous = connections[DEFAULT_DB_ALIAS]
+        connections[DEFAULT_DB_ALIAS] = self.connection
+        try:
+            return method()
+        finally:
+            connections[DEFAULT_DB_ALIAS] = previous
+
+    def read_chunk(self):
+        if self.iterator is None:
+            # Содержимое берётся при первом чтении, чтобы учесть обёртки,
+            # которые middleware устанавливают после представления.
+            self.iterator = iter(self.response)
+        parts, size = [], 0
+        for part in self.iterator:
+            parts.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK_SIZE:
+                break
+        return b''.join(parts)
+
+    def close_response(self):
+        try:
+            self.response.close()
+        finally:
+            self.connection.close()
+            self.connection.dec_thread_sharing()
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет синхронное представление в потоке пула.
+
+    Ответ отрисовывается здесь же. Потоковое содержимое ASGI-обработчик
+    перебирает в цикле событий, где обращения к базе запрещены, поэтому
+    оно читается порциями через PooledStream, который забирает себе
+    соединение потока. Остальные соединения закрываются так же, как
+    после запроса.
+    """
+    close_old_connections()
+    install_query_recorder(connection)
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.streaming:
+            response.pooled_stream = PooledStream(
+                response, connections[DEFAULT_DB_ALIAS]
+            )
+            del connections[DEFAULT_DB_ALIAS]
+        return response
+    finally:
+        close_old_connections()
+
+
+class PooledStreamASGIHandler(ASGIHandler):
+    """ASGI-обработчик, читающий потоковые ответы из PooledStream."""
+
+    async def send_response(self, response, send):
+        stream = getattr(response, 'pooled_stream', None)
+        if stream is None:
+            return await super().send_response(response, send)
+        headers = [
+            (header.encode('ascii'), value.encode('latin1'))
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': headers,
+        })
+        try:
+            while True:
+                part = await stream.read()
+                if not part:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await stream.close()
+
+
+class AsyncReadMixin:
+    """Асинхронные представления для действий из async_actions.
+
+    При ASYNC_VIEWS действия из async_actions выполняются в ограниченном
+    пуле потоков ASYNC_VIEWS_THREADS, и медленный клиент занимает только
+    соединение в цикле событий. Остальные методы маршрута выполняются
+    так же, как обычные синхронные представления под ASGI.
+    """
+
+    async_actions = ()
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        methods = {
+            method for method, action in (actions or {}).items()
+            if action in cls.async_actions
+        }
+        if not settings.ASYNC_VIEWS or not methods:
+            return view
+        if 'get' in methods:
+            methods.add('head')
+        pooled = sync_to_async(
+            functools.partial(run_view, view),
+            thread_sensitive=False,
+            executor=get_executor(),
+        )
+        default = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() in methods:
+                return await pooled(request, *args, **kwargs)
+            return await default(request, *args, **kwargs)
+
+        return functools.update_wrapper(async_view, view)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def make_etag(data):
+    content = json.dumps(
+        data, sort_keys=True, ensure_ascii=False, default=str
+    ).encode()
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def conditional_response(request, get_response, etag, last_modified=None):
+    """Возвращает 304, если валидаторы клиента совпадают с текущими.
+
+    get_response вызывается только при несовпадении, поэтому
+    сериализация для неизменившихся данных не выполняется.
+    """
+    timestamp = last_modified and int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = get_response()
+    response['ETag'] = etag
+    if timestamp:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+class VersionedCache:
+    """Кеш сериализованных данных в памяти процесса.
+
+    Версия увеличивается сигналами post_save/post_delete переданных
+    моделей, после чего данные строятся заново. Время жизни записи
+    ограничено LIST_CACHE_TTL, чтобы изменения, сделанные в других
+    процессах, тоже становились видны.
+    """
+
+    def __init__(self, *models):
+        self._version = 0
+        self._entry = None
+        for model in models:
+            post_save.connect(self.invalidate, sender=model, weak=False)
+            post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    def invalidate(self, **kwargs):
+        self._version += 1
+
+    def get(self, build):
+        """Возвращает пару (данные, ETag), вызывая build при промахе."""
+        entry = self._entry
+        if entry is None or entry[0] != self._version or (
+            time.monotonic() - entry[1] > settings.LIST_CACHE_TTL
+        ):
+            version = self._version
+            data = build()
+            entry = (version, time.monotonic(), data, make_etag(data))
+            self._entry = entry
+        return entry[2], entry[3]
+
+
+class CachedListMixin:
+    """Отдаёт список из VersionedCache с поддержкой ETag и 304.
+
+    Кешируются только запросы без параметров, то есть полный список.
+    """
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        data, etag = self.list_cache.get(
+            lambda: super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            ).data
+        )
+        response = conditional_response(request, lambda: Response(data), etag)
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.LIST_CACHE_MAX_AGE,
+            must_revalidate=True,
+        )
+        return response
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from drf_extra_fields.fields import Base64FieldMixin, Base64ImageField
+from PIL import Image
+
+
+class RecipeImageField(Base64ImageField):
+    """Поле изображения, принимающее base64-строку или файл из multipart.
+
+    Размер и разрешение проверяются до полного декодирования картинки:
+    размер по длине строки или загруженного файла, разрешение по
+    заголовку изображения.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, UploadedFile):
+            self.check_size(data.size)
+            self.check_dimensions(data)
+            return super(Base64FieldMixin, self).to_internal_value(data)
+        if isinstance(data, str):
+            self.check_size(len(data) * 3 // 4)
+        image = super().to_internal_value(data)
+        if image is not None:
+            self.check_dimensions(image)
+        return image
+
+    @staticmethod
+    def check_size(size):
+        if size > settings.RECIPE_IMAGE_MAX_SIZE:
+            raise serializers.ValidationError(
+                'Размер изображения не должен превышать '
+                f'{settings.RECIPE_IMAGE_MAX_SIZE // (1024 * 1024)} МБ'
+            )
+
+    @staticmethod
+    def check_dimensions(file):
+        position = file.tell()
+        try:
+            width, height = Image.open(file).size
+        except (OSError, Image.DecompressionBombError):
+            raise serializers.ValidationError(
+                'Загрузите корректное изображение. Файл не является '
+                'изображением или повреждён.'
+            )
+        finally:
+            file.seek(position)
+        max_dimension = settings.RECIPE_IMAGE_MAX_DIMENSION
+        if width > max_dimension or height > max_dimension:
+            raise serializers.ValidationError(
+                'Ширина и высота изображения не должны превышать '
+                f'{max_dimension} пикселей'
+            )
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список первичных ключей, объекты которых загружаются одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                pk = None if isinstance(item, bool) else pk_field.to_python(
+                    item
+                )
+            except ValidationError:
+                pk = None
+            if pk is None:
+                child.fail('incorrect_type', data_type=type(item).__name__)
+            pks.append(pk)
+        objects = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, который при many=True делает один запрос."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
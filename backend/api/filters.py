@@ -3,6 +3,7 @@ from django_filters.rest_framework import FilterSet, filters
 
 from ingredients.models import Ingredient
 from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
 
 User = get_user_model()
 
@@ -17,10 +18,17 @@ class RecipeFilter(FilterSet):
         to_field_name='slug',
         queryset=Tag.objects.all(),
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Recipe
-        fields = ['is_favorited', 'author', 'is_in_shopping_cart', 'tags']
+        fields = [
+            'is_favorited',
+            'author',
+            'is_in_shopping_cart',
+            'tags',
+            'search',
+        ]
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -34,9 +42,12 @@ class RecipeFilter(FilterSet):
             return queryset.filter(shopping_cart__user=user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
 
 class IngredientFilter(FilterSet):
-    name = filters.CharFilter(lookup_expr='startswith')
+    name = filters.CharFilter(lookup_expr='istartswith')
 
     class Meta:
         model = Ingredient
@@ -1,13 +1,26 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from ingredients.models import Ingredient
+from ingredients.search import ingredient_index
+from ..async_views import AsyncReadMixin
+from ..cache import CachedListMixin, VersionedCache
 from ..filters import IngredientFilter
 from .serializers import IngredientSerializer
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(AsyncReadMixin, CachedListMixin,
+                        ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    list_cache = VersionedCache(Ingredient)
+    async_actions = ('list',)
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name:
+            return Response(ingredient_index.search(name))
+        return super().list(request, *args, **kwargs)
@@ -0,0 +1,172 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Считает SQL-запросы, их суммарное время и повторы.
+
+    Экземпляр передаётся в connection.execute_wrapper. Повтором считается
+    запрос с тем же текстом SQL, что характерно для проблемы N+1.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values())
+
+    def most_repeated(self):
+        sql, count = self.statements.most_common(1)[0]
+        return sql if count > 1 else None
+
+
+current_stats = ContextVar('query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Подключает учёт запросов к соединению текущего потока.
+
+    Статистика запроса к приложению хранится в contextvar, поэтому
+    учитываются и запросы из потоков, в которых ASGI выполняет
+    синхронный код.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@receiver(connection_created)
+def install_query_recorder_on_connect(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+def get_query_budget(view_name, method):
+    """Бюджет вида 'PATCH api:recipes-detail' или всего представления."""
+    budgets = settings.SQL_QUERY_BUDGETS
+    return budgets.get(
+        f'{method.upper()} {view_name}',
+        budgets.get(view_name, settings.SQL_QUERY_BUDGET),
+    )
+
+
+class QueryStatsMiddleware:
+    """Собирает статистику SQL-запросов каждого запроса к приложению.
+
+    При SQL_STATS_HEADERS добавляет заголовки Server-Timing, X-DB-Queries
+    и X-DB-Duplicate-Queries. Запросы, превысившие бюджет из
+    SQL_QUERY_BUDGETS (или SQL_QUERY_BUDGET), пишутся в журнал. Для
+    потокового ответа бюджет проверяется после его отправки с учётом SQL,
+    выполненного при чтении, а заголовки содержат запросы до начала
+    отправки. Работает как под WSGI, так и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            # Так Django распознаёт асинхронный экземпляр middleware.
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        install_query_recorder(connection)
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process_stats(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = QueryStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.process_stats(request, response, stats)
+
+    def process_stats(self, request, response, stats):
+        if settings.SQL_STATS_HEADERS:
+            response['X-DB-Queries'] = stats.count
+            response['X-DB-Duplicate-Queries'] = stats.duplicates
+            response['Server-Timing'] = (
+                f'db;dur={stats.duration * 1000:.1f};'
+                f'desc="{stats.count} queries"'
+            )
+        if response.streaming:
+            response.streaming_content = self.count_streaming(
+                request, response.streaming_content, stats
+            )
+        else:
+            self.check_budget(request, stats)
+        return response
+
+    def count_streaming(self, request, content, stats):
+        """Учитывает SQL, выполненный при чтении потокового ответа."""
+        iterator = iter(content)
+        try:
+            while True:
+                token = current_stats.set(stats)
+                try:
+                    part = next(iterator, None)
+                finally:
+                    current_stats.reset(token)
+                if part is None:
+                    return
+                yield part
+        finally:
+            self.check_budget(request, stats)
+
+    def check_budget(self, request, stats):
+        match = request.resolver_match
+        if match is None:
+            return
+        budget = get_query_budget(match.view_name, request.method)
+        if stats.count > budget:
+            logger.warning(
+                'Превышен бюджет SQL-запросов: %s %s (%s), запросов %d '
+                'из %d, повторов %d, время %.1f мс. Чаще всего: %s',
+                request.method,
+                request.path,
+                match.view_name,
+                stats.count,
+                budget,
+                stats.duplicates,
+                stats.duration * 1000,
+                stats.most_repeated(),
+            )
@@ -1,5 +1,99 @@
-from rest_framework.pagination import PageNumberPagination
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Курсорная пагинация ленты рецептов по (pub_date, id).
+
+    Курсор хранит дату публикации и id крайнего рецепта страницы, и
+    следующая страница выбирается условием по обоим полям, без OFFSET и
+    COUNT(*). Поэтому время ответа не зависит от глубины страницы, а
+    страницы не сдвигаются при добавлении и удалении рецептов с той же
+    датой. Порядок по релевантности из search с курсором несовместим.
+    """
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
+
+    @staticmethod
+    def is_requested(request):
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or 'cursor' in request.query_params
+        )
+
+    def decode_position(self, cursor):
+        pub_date, _, pk = (cursor.position or '').rpartition('_')
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, int(pk)
+
+    def encode_position(self, recipe, reverse):
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=reverse,
+            position=f'{recipe.pub_date.isoformat()}_{recipe.pk}',
+        ))
+
+    @staticmethod
+    def filter_position(queryset, pub_date, pk, reverse):
+        """Рецепты после позиции курсора в порядке страницы.
+
+        Отдельное условие на pub_date задаёт границу диапазона индекса
+        (pub_date, id), иначе индекс читается с начала и фильтруется.
+        """
+        if reverse:
+            return queryset.filter(pub_date__gte=pub_date).filter(
+                Q(pub_date__gt=pub_date) | Q(pk__gt=pk)
+            )
+        return queryset.filter(pub_date__lte=pub_date).filter(
+            Q(pub_date__lt=pub_date) | Q(pk__lt=pk)
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('search'):
+            raise ValidationError({
+                'search': 'Поиск сортирует рецепты по релевантности и не '
+                          'поддерживает курсорную пагинацию, используйте '
+                          'page.'
+            })
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            queryset = self.filter_position(
+                queryset, *self.decode_position(self.cursor), reverse
+            )
+        queryset = queryset.order_by(
+            *(('pub_date', 'id') if reverse else self.ordering)
+        )
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_position(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_position(self.page[0], reverse=True)
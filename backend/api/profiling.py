@@ -0,0 +1,298 @@
+import base64
+import io
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection, transaction
+from django.db.models import Count
+from django.urls import URLPattern, URLResolver, resolve, reverse
+from rest_framework.test import APIClient
+from djoser.utils import encode_uid
+
+from PIL import Image
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+
+from . import urls
+from .middleware import install_query_recorder
+
+User = get_user_model()
+
+HOT_ENDPOINTS = (
+    '/api/recipes/?page=1&limit=6',
+    '/api/recipes/?pagination=cursor&limit=6',
+    '/api/recipes/?page=1&limit=6&tags={tag}',
+    '/api/recipes/?page=1&limit=6&author={author}',
+    '/api/recipes/?page=1&limit=6&is_favorited=1',
+    '/api/recipes/?page=1&limit=6&is_in_shopping_cart=1',
+    '/api/recipes/?page=1&limit=6&search={search}',
+    '/api/recipes/{recipe}/',
+    '/api/recipes/feed/',
+    '/api/recipes/shopping_list/',
+    '/api/recipes/download_shopping_cart/?format=json',
+    '/api/users/?page=1&limit=6',
+    '/api/users/{author}/',
+    '/api/users/me/',
+    '/api/users/subscriptions/?page=1&limit=6&recipes_limit=3',
+    '/api/tags/',
+    '/api/ingredients/',
+    '/api/ingredients/?name={ingredient}',
+    '/api/ingredients/{ingredient_id}/',
+)
+
+BENCHMARK_ENDPOINTS = {
+    'recipe_list': '/api/recipes/?page=1&limit=6',
+    'recipe_list_cursor': '/api/recipes/?pagination=cursor&limit=6',
+    'recipe_detail': '/api/recipes/{recipe}/',
+    'filter_tags': '/api/recipes/?page=1&limit=6&tags={tag}',
+    'filter_author': '/api/recipes/?page=1&limit=6&author={author}',
+    'filter_favorited': '/api/recipes/?page=1&limit=6&is_favorited=1',
+    'filter_in_cart': '/api/recipes/?page=1&limit=6&is_in_shopping_cart=1',
+    'filter_search': '/api/recipes/?page=1&limit=6&search={search}',
+    'download_shopping_cart':
+        '/api/recipes/download_shopping_cart/?format=txt',
+    'subscriptions': '/api/users/subscriptions/?page=1&limit=6'
+                     '&recipes_limit=3',
+    'ingredient_search': '/api/ingredients/?name={ingredient}',
+}
+
+# Параметры, с которыми фронтенд запрашивает списки.
+LIST_QUERY = '?page=1&limit=6&recipes_limit=3'
+
+IGNORED_METHODS = ('head', 'options', 'trace')
+
+# Пароль, который проверка бюджетов временно ставит пользователю.
+SAMPLE_PASSWORD = 'Budget-check-password-42'
+
+# Действия-переключатели: перед замером добавления объект удаляется, а
+# перед замером удаления добавляется, чтобы измерялся успешный путь.
+TOGGLE_VIEWS = (
+    'api:recipes-favorite',
+    'api:recipes-shopping-cart',
+    'api:recipes-bulk-favorite',
+    'api:recipes-bulk-shopping-cart',
+    'api:users-subscribe',
+)
+
+OPPOSITE_METHODS = {'post': 'delete', 'delete': 'post'}
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def get_sample_user(user_id=None):
+    """Пользователь, от имени которого выполняются проверочные запросы.
+
+    По умолчанию выбирается пользователь с наибольшим избранным.
+    """
+    if user_id is not None:
+        return User.objects.get(pk=user_id)
+    return User.objects.annotate(
+        favorites_total=Count('favorites')
+    ).order_by('-favorites_total', 'pk').first()
+
+
+def get_sample_context(user=None):
+    """Id и slug существующих объектов для подстановки в адреса.
+
+    Возвращает None, если в базе нет рецептов, тегов или ингредиентов.
+    """
+    recipes = Recipe.objects.order_by('-pub_date', '-id')
+    recipe = recipes.filter(author=user).first() or recipes.first()
+    tags = list(Tag.objects.order_by('id')[:2])
+    ingredient = Ingredient.objects.order_by('id').first()
+    if recipe is None or not tags or ingredient is None:
+        return None
+    following = recipes.exclude(author=recipe.author_id).first() or recipe
+    return {
+        'recipe': recipe.id,
+        'recipes': list(recipes.values_list('id', flat=True)[:6]),
+        'author': recipe.author_id,
+        'following': following.author_id,
+        'search': recipe.name.split()[0],
+        'tag': tags[0].slug,
+        'tag_id': tags[0].id,
+        'tag_ids': [tag.id for tag in tags],
+        'ingredient': ingredient.name[:3],
+        'ingredient_id': ingredient.id,
+    }
+
+
+def make_sample_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), 'white').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def get_sample_payloads(context, user):
+    """Тела запросов, с которыми маршруты изменения данных проходят
+    валидацию.
+
+    Ключи имеют вид 'POST api:recipes-list', как в SQL_QUERY_BUDGETS.
+    Пароль пользователя должен быть равен SAMPLE_PASSWORD. Активация и
+    письма для сброса пароля и email в настройках djoser не включены,
+    такие маршруты проверяются с пустым телом.
+    """
+    recipe = {
+        'name': 'Проверка бюджета',
+        'text': 'Рецепт для проверки числа SQL-запросов.',
+        'cooking_time': 10,
+        'image': make_sample_image(),
+        'tags': context['tag_ids'],
+        'ingredients': [{'id': context['ingredient_id'], 'amount': 100}],
+    }
+    profile = {
+        'email': 'budget-check@example.com',
+        'username': 'budget-check',
+        'first_name': 'Проверка',
+        'last_name': 'Бюджета',
+    }
+    password = {'current_password': SAMPLE_PASSWORD}
+    confirm = {
+        'uid': encode_uid(user.pk),
+        'token': default_token_generator.make_token(user),
+    }
+    recipe_ids = {'recipes': context['recipes']}
+    return {
+        'POST api:recipes-list': recipe,
+        'PUT api:recipes-detail': recipe,
+        'PATCH api:recipes-detail': {
+            'name': recipe['name'],
+            'ingredients': recipe['ingredients'],
+        },
+        'POST api:recipes-bulk-favorite': recipe_ids,
+        'DELETE api:recipes-bulk-favorite': recipe_ids,
+        'POST api:recipes-bulk-shopping-cart': recipe_ids,
+        'DELETE api:recipes-bulk-shopping-cart': recipe_ids,
+        'POST api:users-list': {**profile, 'password': SAMPLE_PASSWORD},
+        'PUT api:users-me': profile,
+        'PATCH api:users-me': {'first_name': profile['first_name']},
+        'DELETE api:users-me': password,
+        'PUT api:users-detail': profile,
+        'PATCH api:users-detail': {'first_name': profile['first_name']},
+        'DELETE api:users-detail': password,
+        'POST api:users-set-password': {
+            **password, 'new_password': f'{SAMPLE_PASSWORD}-new',
+        },
+        'POST api:users-set-username': {
+            **password, 'new_email': profile['email'],
+        },
+        'POST api:users-reset-password-confirm': {
+            **confirm, 'new_password': f'{SAMPLE_PASSWORD}-new',
+        },
+        'POST api:users-reset-username-confirm': {
+            **confirm, 'new_email': profile['email'],
+        },
+        'POST api:login': {'email': user.email, 'password': SAMPLE_PASSWORD},
+    }
+
+
+def get_endpoint_paths(context):
+    return [path.format(**context) for path in HOT_ENDPOINTS]
+
+
+def _iter_patterns(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield pattern
+
+
+def _get_methods(view):
+    actions = getattr(view, 'actions', None)
+    if actions is not None:
+        methods = actions
+    else:
+        view_class = getattr(view, 'cls', None) or view.view_class
+        methods = [
+            method for method in view_class.http_method_names
+            if hasattr(view_class, method)
+        ]
+    return [method for method in methods if method not in IGNORED_METHODS]
+
+
+def iter_api_routes(context):
+    """Перебирает маршруты api/urls.py в виде (имя, метод, адрес).
+
+    Адреса строятся через reverse с id объектов из context и
+    разрешаются заново, поэтому маршруты djoser, перекрытые своими
+    представлениями, встречаются один раз.
+    """
+    kwargs_by_name = {'users-subscribe': context['following']}
+    kwargs_by_prefix = {
+        'recipes': context['recipe'],
+        'users': context['author'],
+        'user': context['author'],
+        'tags': context['tag_id'],
+        'ingredients': context['ingredient_id'],
+    }
+    seen = set()
+    for pattern in _iter_patterns(urls.urlpatterns):
+        groups = pattern.pattern.regex.groupindex
+        if 'format' in groups:
+            continue
+        object_id = kwargs_by_name.get(
+            pattern.name, kwargs_by_prefix.get(pattern.name.split('-')[0])
+        )
+        if groups and object_id is None:
+            continue
+        path = reverse(
+            f'{urls.app_name}:{pattern.name}',
+            kwargs={group: object_id for group in groups},
+        )
+        match = resolve(path)
+        if match.view_name in seen:
+            continue
+        seen.add(match.view_name)
+        for method in _get_methods(match.func):
+            if method == 'get':
+                yield match.view_name, method, path + LIST_QUERY
+            else:
+                yield match.view_name, method, path
+
+
+def capture_queries(path, user=None, method='get', data=None):
+    """Выполняет запрос к API и возвращает ответ и SQL-запросы.
+
+    Запросы собираются через connection.execute_wrapper в виде пар
+    (sql, params), потоковый ответ читается целиком.
+    """
+    queries = []
+
+    def collect(execute, sql, params, many, context):
+        queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    # Учёт запросов middleware подключается заранее: execute_wrapper
+    # снимает при выходе последнюю обёртку, и ею должна быть collect.
+    install_query_recorder(connection)
+    with connection.execute_wrapper(collect):
+        response = getattr(client, method)(path, data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return response, queries
+
+
+def measure_route(view_name, method, path, user, data=None):
+    """Выполняет запрос в откатываемой транзакции.
+
+    Возвращает код ответа и число SQL-запросов. Для переключателей
+    сначала выполняется обратное действие, чтобы измерялся успешный путь.
+    """
+    # Удаление пользователя обнуляет pk у объекта, поэтому каждый
+    # запрос выполняется от имени заново загруженного пользователя.
+    user = User.objects.get(pk=user.pk)
+    with transaction.atomic():
+        if view_name in TOGGLE_VIEWS and method in OPPOSITE_METHODS:
+            capture_queries(path, user, OPPOSITE_METHODS[method], data)
+        response, queries = capture_queries(path, user, method, data)
+        transaction.set_rollback(True)
+    return response.status_code, len(queries)
@@ -0,0 +1,164 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from favorites.models import Favorite
+from recipes.models import Recipe
+from shoppingcarts.models import ShoppingCart
+from shoppingcarts.shopping_lists import update_shopping_lists
+
+COUNTER_FIELDS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+ADDED = 'added'
+ALREADY_ADDED = 'already_added'
+REMOVED = 'removed'
+NOT_ADDED = 'not_added'
+NOT_FOUND = 'not_found'
+
+
+def change_counters(model, recipe_ids, delta):
+    field = COUNTER_FIELDS[model]
+    recipes = Recipe.objects.filter(id__in=recipe_ids)
+    if delta < 0:
+        recipes = recipes.filter(**{f'{field}__gte': -delta})
+    recipes.update(**{field: F(field) + delta})
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def insert_rows(model, user_id, recipe_ids):
+    """Вставляет строки пользователя одним INSERT ... ON CONFLICT.
+
+    Возвращает id рецептов, строки которых вставил именно этот запрос:
+    строки, добавленные параллельным запросом, база пропускает.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return set()
+    table = connection.ops.quote_name(model._meta.db_table)
+    values = ', '.join(['(%s, %s)'] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, recipe_id) VALUES {values} '
+            f'ON CONFLICT DO NOTHING RETURNING recipe_id',
+            [value for recipe_id in recipe_ids
+             for value in (user_id, recipe_id)],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def delete_rows(model, recipe_ids, user_id=None):
+    """Удаляет строки рецептов одним DELETE без отправки сигналов.
+
+    Затрагиваются строки всех пользователей либо только user_id.
+    Возвращает id рецептов, строки которых были удалены.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return set()
+    table = connection.ops.quote_name(model._meta.db_table)
+    where = f'recipe_id IN ({_placeholders(recipe_ids)})'
+    params = recipe_ids
+    if user_id is not None:
+        where += ' AND user_id = %s'
+        params = [*recipe_ids, user_id]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {where} RETURNING recipe_id', params
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+@transaction.atomic
+def bulk_add(model, user, recipe_ids):
+    """Добавляет рецепты в избранное или список покупок.
+
+    Возвращает словарь {id рецепта: статус}. Вставка выполняется одним
+    запросом, и счётчики меняются только для действительно вставленных
+    строк.
+    """
+    existing_ids = set(
+        Recipe.objects.filter(id__in=recipe_ids).values_list('id', flat=True)
+    )
+    added_ids = insert_rows(model, user.pk, existing_ids)
+    change_counters(model, added_ids, 1)
+    if model is ShoppingCart:
+        update_shopping_lists(added_ids, 1, user.pk)
+    return {
+        recipe_id: (
+            NOT_FOUND if recipe_id not in existing_ids
+            else ADDED if recipe_id in added_ids
+            else ALREADY_ADDED
+        )
+        for recipe_id in recipe_ids
+    }
+
+
+@transaction.atomic
+def bulk_remove(model, user, recipe_ids):
+    """Удаляет рецепты из избранного или списка покупок одним запросом.
+
+    Возвращает словарь {id рецепта: статус}. Строки блокируются до
+    удаления, чтобы список покупок и счётчики изменились ровно на
+    удалённые этим запросом строки.
+    """
+    locked_ids = list(
+        model.objects.select_for_update().filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)
+    )
+    if model is ShoppingCart:
+        update_shopping_lists(locked_ids, -1, user.pk)
+    removed_ids = delete_rows(model, locked_ids, user.pk)
+    change_counters(model, removed_ids, -1)
+    return {
+        recipe_id: REMOVED if recipe_id in removed_ids else NOT_ADDED
+        for recipe_id in recipe_ids
+    }
+
+
+@transaction.atomic
+def detach_recipes(recipe_ids):
+    """Убирает рецепты из избранного и списков покупок перед удалением.
+
+    Ингредиенты вычитаются из списков покупок одним запросом, а строки
+    удаляются без сигналов, которые по одной обновляли бы счётчики
+    удаляемых рецептов.
+    """
+    recipe_ids = list(recipe_ids)
+    update_shopping_lists(recipe_ids, -1)
+    for model in COUNTER_FIELDS:
+        delete_rows(model, recipe_ids)
+
+
+@transaction.atomic
+def copy_favorites_to_cart(user):
+    """Добавляет все избранные рецепты пользователя в список покупок.
+
+    Выполняется одним INSERT ... SELECT, возвращает id добавленных
+    рецептов.
+    """
+    quote = connection.ops.quote_name
+    cart_table = quote(ShoppingCart._meta.db_table)
+    favorite_table = quote(Favorite._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {cart_table} (user_id, recipe_id) '
+            f'SELECT favorite.user_id, favorite.recipe_id '
+            f'FROM {favorite_table} AS favorite '
+            f'WHERE favorite.user_id = %s AND NOT EXISTS ('
+            f'SELECT 1 FROM {cart_table} AS cart '
+            f'WHERE cart.user_id = favorite.user_id '
+            f'AND cart.recipe_id = favorite.recipe_id) '
+            f'ON CONFLICT DO NOTHING '
+            f'RETURNING recipe_id',
+            [user.pk],
+        )
+        added_ids = [row[0] for row in cursor.fetchall()]
+    change_counters(ShoppingCart, added_ids, 1)
+    update_shopping_lists(added_ids, 1, user.pk)
+    return added_ids
@@ -1,16 +1,36 @@
-from django.db.models import F
-from django.shortcuts import get_object_or_404
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.utils import html
 
 from favorites.models import Favorite
 from ingredients.models import Ingredient
+from recipes.images import get_image_variant_urls
 from recipes.models import IngredientRecipe, Recipe
-from shoppingcarts.models import ShoppingCart
+from recipes.search import update_search_vector
+from recipes.signals import skip_ingredient_touch
+from recipes.snapshots import update_ingredient_snapshots
+from shoppingcarts.models import ShoppingCart, ShoppingListItem
+from shoppingcarts.shopping_lists import update_shopping_lists
 from tags.models import Tag
+from ..fields import BulkPrimaryKeyRelatedField, RecipeImageField
 from ..tags.serializers import TagSerializer
 from ..users.serializers import CustomUserSerializer
 
+JSON_FIELDS = ('tags', 'ingredients')
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Сериализатор списка рецептов с чтением фрагментов из кеша."""
+
+    def to_representation(self, data):
+        return self.child.to_representation_many(list(data))
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Recipe."""
@@ -28,9 +48,13 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
+    )
 
     class Meta:
         model = Recipe
+        list_serializer_class = RecipeListSerializer
         fields = (
             'id',
             'tags',
@@ -40,34 +64,82 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         )
 
-    def get_ingredients(self, obj):
-        recipe = obj
+    def get_cache_key(self, recipe):
+        base_url = self.context['request'].build_absolute_uri('/')
         return (
-            recipe.ingredients.values(
-                'id',
-                'name',
-                'measurement_unit',
-                amount=F('ingredientrecipe__amount')
-            )
+            f'recipe:{recipe.id}:{recipe.updated_at.isoformat()}:{base_url}'
         )
 
+    def add_user_fields(self, recipe, data):
+        data['is_favorited'] = self.get_is_favorited(recipe)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(recipe)
+        data['author']['is_subscribed'] = (
+            self.fields['author'].get_is_subscribed(recipe.author)
+        )
+        return data
+
+    def to_representation_many(self, recipes):
+        """Читает фрагменты рецептов из кеша одним get_many.
+
+        Представление рецепта одинаково для всех пользователей, кроме
+        is_favorited, is_in_shopping_cart и author.is_subscribed, поэтому
+        фрагмент хранится по id и updated_at рецепта, а эти поля
+        подставляются при каждом ответе. Любое изменение рецепта, его
+        ингредиентов, тегов или профиля автора обновляет updated_at, и
+        старый фрагмент больше не читается. Недостающие фрагменты
+        сериализуются с подгрузкой тегов только для них и сохраняются в
+        кеш.
+        """
+        keys = [self.get_cache_key(recipe) for recipe in recipes]
+        cached = cache.get_many(keys)
+        missing = [
+            recipe for recipe, key in zip(recipes, keys) if key not in cached
+        ]
+        built = {}
+        if missing:
+            prefetch_related_objects(missing, 'tags')
+            for recipe in missing:
+                built[self.get_cache_key(recipe)] = (
+                    super().to_representation(recipe)
+                )
+            cache.set_many(built, settings.RECIPE_FRAGMENT_TTL)
+        return [
+            built[key] if key in built
+            else self.add_user_fields(recipe, cached[key])
+            for recipe, key in zip(recipes, keys)
+        ]
+
+    def to_representation(self, instance):
+        return self.to_representation_many([instance])[0]
+
+    def get_ingredients(self, obj):
+        return obj.ingredients_snapshot
+
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(obj, self.context.get('request'))
+
     def get_is_favorited(self, obj):
         user = self.context['request'].user
-        return user.is_authenticated and Favorite.objects.filter(
-            user=user,
-            recipe=obj
-        ).exists()
+        if not user.is_authenticated:
+            return False
+        is_favorited = getattr(obj, 'is_favorited', None)
+        if is_favorited is not None:
+            return is_favorited
+        return Favorite.objects.filter(user=user, recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         user = self.context['request'].user
-        return ShoppingCart.objects.filter(
-            user=user,
-            recipe=obj
-        ).exists() if user.is_authenticated else False
+        if not user.is_authenticated:
+            return False
+        is_in_shopping_cart = getattr(obj, 'is_in_shopping_cart', None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
+        return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
 
 
 class IngredientRecipeSerializer(serializers.ModelSerializer):
@@ -83,23 +155,71 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания рецепта с дополнительной валидацией."""
     author = CustomUserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BulkPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True
     )
     ingredients = IngredientRecipeSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
     cooking_time = serializers.IntegerField()
 
+    def to_internal_value(self, data):
+        if html.is_html_input(data):
+            data = self.parse_json_fields(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def parse_json_fields(data):
+        """Разбирает теги и ингредиенты, переданные в multipart JSON-ом.
+
+        Если JSON-строк нет, данные возвращаются без изменений и
+        разбираются стандартной HTML-нотацией DRF.
+        """
+        json_fields = {
+            key: data[key] for key in JSON_FIELDS
+            if isinstance(data.get(key), str)
+            and data[key].lstrip().startswith('[')
+        }
+        if not json_fields:
+            return data
+        parsed = {key: data[key] for key in data}
+        if 'tags' in data:
+            parsed['tags'] = data.getlist('tags')
+        for key, value in json_fields.items():
+            try:
+                parsed[key] = json.loads(value)
+            except ValueError:
+                raise serializers.ValidationError(
+                    {key: 'Некорректный JSON'}
+                )
+        return parsed
+
     def validate(self, data):
         cooking_time = data.get('cooking_time')
 
-        if cooking_time <= 0:
+        if cooking_time is not None and cooking_time <= 0:
             raise serializers.ValidationError(
                 'Время приготовления должно быть больше 0'
             )
 
         ingredients_data = data.get('ingredients')
+        if ingredients_data is not None:
+            self.check_ingredients(ingredients_data)
+
+        if 'tags' in data and not data['tags']:
+            raise serializers.ValidationError(
+                'Необходимо указать хотя бы один тег'
+            )
+
+        if 'ingredients' in data and not data['ingredients']:
+            raise serializers.ValidationError(
+                'Необходимо указать хотя бы один ингредиент'
+            )
+
+        return data
+
+    @staticmethod
+    def check_ingredients(ingredients_data):
         ingredient_ids = set()
         for ingredient_data in ingredients_data:
             amount = ingredient_data.get('amount')
@@ -113,60 +233,90 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
                     'Ингредиенты не должны дублироваться'
                 )
             ingredient_ids.add(ingredient_id)
-            try:
-                Ingredient.objects.get(id=ingredient_id)
-            except Ingredient.DoesNotExist:
-                raise serializers.ValidationError(
-                    'Ингредиента с указанным идентификатором '
-                    'не существует в базе данных'
-                )
 
-        if not data.get('tags'):
+        missing_ids = ingredient_ids - set(
+            Ingredient.objects.filter(
+                id__in=ingredient_ids
+            ).values_list('id', flat=True)
+        )
+        if missing_ids:
             raise serializers.ValidationError(
-                'Необходимо указать хотя бы один тег'
+                'Ингредиентов с идентификаторами '
+                f'{", ".join(map(str, sorted(missing_ids)))} '
+                'не существует в базе данных'
             )
 
-        if not data.get('ingredients'):
-            raise serializers.ValidationError(
-                'Необходимо указать хотя бы один ингредиент'
+    @staticmethod
+    def create_ingredients(recipe, ingredients_data):
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe,
+                ingredient_id=ingredient_data['id'],
+                amount=ingredient_data['amount'],
             )
+            for ingredient_data in ingredients_data
+        )
 
-        return data
-
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get('request').user
         tags = validated_data.pop('tags')
         ingredients_data = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(author=author, **validated_data)
         recipe.tags.set(tags)
-        for ingredient_data in ingredients_data:
-            ingredient = Ingredient.objects.get(id=ingredient_data.get('id'))
-            amount = ingredient_data.get('amount')
-            IngredientRecipe.objects.create(
-                recipe=recipe,
-                ingredient=ingredient,
-                amount=amount)
+        self.create_ingredients(recipe, ingredients_data)
+        recipe.ingredients_snapshot = (
+            update_ingredient_snapshots([recipe.pk])[recipe.pk]
+        )
+        update_search_vector([recipe.pk])
         return recipe
 
-    def update(self, instance, validated_data):
-        tags = validated_data.pop('tags', None)
-        instance.tags.set(tags)
+    @classmethod
+    def update_ingredients(cls, recipe, ingredients_data):
+        """Приводит ингредиенты рецепта к переданному списку.
 
-        ingredients = validated_data.pop('ingredients', None)
-        instance.ingredients.clear()
+        Изменяются только отличающиеся строки: новые создаются,
+        изменённые обновляются, лишние удаляются. Рецепт после каждой
+        строки не обновляется, снимок ингредиентов пересчитывает update.
+        Сводные списки покупок с этим рецептом пересчитываются: старый
+        состав вычитается до изменения, новый прибавляется после.
+        """
+        update_shopping_lists([recipe.pk], -1)
+        amounts = {item['id']: item['amount'] for item in ingredients_data}
+        to_update, to_delete, kept_ids = [], [], set()
+        for item in IngredientRecipe.objects.filter(recipe=recipe):
+            if item.ingredient_id not in amounts or (
+                item.ingredient_id in kept_ids
+            ):
+                to_delete.append(item.id)
+                continue
+            kept_ids.add(item.ingredient_id)
+            if item.amount != amounts[item.ingredient_id]:
+                item.amount = amounts[item.ingredient_id]
+                to_update.append(item)
 
-        ingredient_ids = set()
-        for ingredient in ingredients:
-            amount = ingredient['amount']
-            ingredient_id = ingredient['id']
-            ingredient_ids.add(ingredient_id)
+        if to_delete:
+            with skip_ingredient_touch([recipe.pk]):
+                IngredientRecipe.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            IngredientRecipe.objects.bulk_update(to_update, ['amount'])
+        cls.create_ingredients(
+            recipe,
+            [item for item in ingredients_data if item['id'] not in kept_ids]
+        )
+        update_shopping_lists([recipe.pk], 1)
 
-            ingredient = get_object_or_404(Ingredient, pk=ingredient['id'])
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            instance.tags.set(tags)
 
-            IngredientRecipe.objects.update_or_create(
-                recipe=instance,
-                ingredient=ingredient,
-                defaults={'amount': amount}
+        ingredients_data = validated_data.pop('ingredients', None)
+        if ingredients_data is not None:
+            self.update_ingredients(instance, ingredients_data)
+            instance.ingredients_snapshot = (
+                update_ingredient_snapshots([instance.pk])[instance.pk]
             )
 
         return super().update(instance, validated_data)
@@ -191,3 +341,25 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для массовых операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+
+
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор для модели ShoppingListItem."""
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
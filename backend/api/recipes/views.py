@@ -1,40 +1,177 @@
-from django.db.models import Sum
-from django.http import FileResponse
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from api.async_views import AsyncReadMixin
+from api.cache import conditional_response, make_etag
 from api.filters import RecipeFilter
+from api.pagination import CustomPagination, RecipeCursorPagination
 from api.permissions import OwnerOrReadOnly
-from api.utils import generate_shopping_cart_text
+from api.renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+from api.uploadhandlers import RecipeImageUploadHandler
+from api.utils import SHOPPING_CART_GENERATORS, get_following_ids
 from favorites.models import Favorite
-from recipes.models import IngredientRecipe, Recipe
-from shoppingcarts.models import ShoppingCart
+from recipes.models import Recipe
+from recipes.signals import skip_ingredient_touch
+from shoppingcarts.models import ShoppingCart, ShoppingListItem
+from users.models import Subscription
 from ..users.serializers import ShortRecipeSerializer
-from .serializers import RecipeCreateSerializer, RecipeSerializer
+from .bulk import (bulk_add, bulk_remove, copy_favorites_to_cart,
+                   detach_recipes)
+from .serializers import (RecipeCreateSerializer, RecipeIdsSerializer,
+                          RecipeSerializer, ShoppingListItemSerializer)
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.all()
+class RecipeViewSet(AsyncReadMixin, ModelViewSet):
+    # Теги подгружаются сериализатором только для рецептов, которых нет
+    # в кеше фрагментов.
+    queryset = Recipe.objects.select_related('author')
+    async_actions = ('list', 'retrieve', 'download_shopping_cart')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     permission_classes = (IsAuthenticatedOrReadOnly, OwnerOrReadOnly)
 
+    @property
+    def pagination_class(self):
+        if self.action == 'feed' or RecipeCursorPagination.is_requested(
+            self.request
+        ):
+            return RecipeCursorPagination
+        return CustomPagination
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [RecipeImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user,
+                        recipe=OuterRef('pk')
+                    )
+                ),
+            )
+        if self.action == 'feed':
+            queryset = queryset.filter(Exists(
+                Subscription.objects.filter(
+                    user=user,
+                    following=OuterRef('author')
+                )
+            ))
+        return queryset
+
+    def get_validators(self, recipes, extra=None):
+        """Возвращает ETag и дату изменения для набора рецептов.
+
+        Кроме версии рецепта в ETag входят флаги текущего пользователя и
+        данные автора, которые тоже попадают в ответ.
+        """
+        user = self.request.user
+        following_ids = (
+            get_following_ids(self.request) if user.is_authenticated
+            else set()
+        )
+        state = [
+            (
+                recipe.id,
+                recipe.updated_at.isoformat(),
+                bool(getattr(recipe, 'is_favorited', False)),
+                bool(getattr(recipe, 'is_in_shopping_cart', False)),
+                recipe.author_id in following_ids,
+                recipe.author.email,
+                recipe.author.username,
+                recipe.author.first_name,
+                recipe.author.last_name,
+            )
+            for recipe in recipes
+        ]
+        last_modified = max(
+            (recipe.updated_at for recipe in recipes), default=None
+        )
+        return make_etag([extra, state]), last_modified
+
+    def conditional_response(self, recipes, get_response, extra=None):
+        etag, last_modified = self.get_validators(recipes, extra)
+        response = conditional_response(
+            self.request, get_response, etag, last_modified
+        )
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        recipes = list(queryset) if page is None else page
+
+        def get_response():
+            serializer = self.get_serializer(recipes, many=True)
+            if page is None:
+                return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
+
+        extra = None
+        if isinstance(self.paginator, CustomPagination) and page is not None:
+            extra = (
+                request.get_full_path(),
+                self.paginator.page.paginator.count,
+            )
+        elif page is not None:
+            extra = request.get_full_path()
+        return self.conditional_response(recipes, get_response, extra)
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        return self.conditional_response(
+            [recipe],
+            lambda: Response(self.get_serializer(recipe).data)
+        )
+
     def get_serializer_class(self):
-        if self.action in ('create', 'partial_update'):
+        if self.action in ('create', 'update', 'partial_update'):
             return RecipeCreateSerializer
         return RecipeSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Избранное и корзина с рецептом убираются одним запросом на
+        # модель. Ингредиенты удаляются каскадом вместе с рецептом,
+        # обновлять его после каждой строки не нужно.
+        detach_recipes([instance.pk])
+        with skip_ingredient_touch([instance.pk]):
+            instance.delete()
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        return self.list(request)
+
     @action(
         detail=True,
         methods=['POST'],
         permission_classes=[IsAuthenticated]
     )
+    @transaction.atomic
     def favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -62,6 +199,7 @@ class RecipeViewSet(ModelViewSet):
         )
 
     @favorite.mapping.delete
+    @transaction.atomic
     def remove_favorite(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -85,6 +223,7 @@ class RecipeViewSet(ModelViewSet):
         methods=['POST'],
         permission_classes=[IsAuthenticated]
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -108,6 +247,7 @@ class RecipeViewSet(ModelViewSet):
         )
 
     @shopping_cart.mapping.delete
+    @transaction.atomic
     def remove_from_shopping_cart(self, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
         user = request.user
@@ -126,22 +266,95 @@ class RecipeViewSet(ModelViewSet):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+    def bulk_response(self, request, handler, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        statuses = handler(model, request.user, recipe_ids)
+        return Response([
+            {'id': recipe_id, 'status': statuses[recipe_id]}
+            for recipe_id in recipe_ids
+        ])
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        url_path='favorite/bulk',
+    )
+    def bulk_favorite(self, request):
+        return self.bulk_response(request, bulk_add, Favorite)
+
+    @bulk_favorite.mapping.delete
+    def bulk_remove_favorite(self, request):
+        return self.bulk_response(request, bulk_remove, Favorite)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart/bulk',
+    )
+    def bulk_shopping_cart(self, request):
+        return self.bulk_response(request, bulk_add, ShoppingCart)
+
+    @bulk_shopping_cart.mapping.delete
+    def bulk_remove_from_shopping_cart(self, request):
+        return self.bulk_response(request, bulk_remove, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[IsAuthenticated],
+        url_path='shopping_cart/from_favorites',
+    )
+    def shopping_cart_from_favorites(self, request):
+        added_ids = copy_favorites_to_cart(request.user)
+        return Response({'added': added_ids})
+
+    @staticmethod
+    def get_shopping_list(user):
+        """Сводный список покупок пользователя, читается одним запросом."""
+        return ShoppingListItem.objects.filter(
+            user=user, amount__gt=0
+        ).select_related('ingredient').order_by('ingredient__name')
+
     @action(
         detail=False,
         methods=['GET'],
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_list(self, request):
+        serializer = ShoppingListItemSerializer(
+            self.get_shopping_list(request.user), many=True
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[
+            PlainTextRenderer,
+            CSVRenderer,
+            JSONRenderer,
+            PDFRenderer,
+        ],
     )
     def download_shopping_cart(self, request):
-        shopping_cart = ShoppingCart.objects.filter(user=self.request.user)
-        recipes_in_shopping_cart = [item.recipe.id for item in shopping_cart]
-        ingredients_to_buy = IngredientRecipe.objects.filter(
-            recipe__in=recipes_in_shopping_cart).values('ingredient').annotate(
-                amount=Sum('amount'))
-
-        shopping_cart_text = generate_shopping_cart_text(ingredients_to_buy)
-
-        return FileResponse(
-            shopping_cart_text,
-            content_type="text/plain",
-            filename='shopping_cart.txt'
+        ingredients_to_buy = self.get_shopping_list(request.user).values(
+            'amount',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+        )
+
+        renderer = request.accepted_renderer
+        generator = SHOPPING_CART_GENERATORS[renderer.format]
+        response = StreamingHttpResponse(
+            generator(ingredients_to_buy.iterator()),
+            content_type=renderer.media_type,
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_cart.{renderer.format}"'
         )
+        return response
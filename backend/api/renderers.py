@@ -0,0 +1,25 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class PlainTextRenderer(BaseRenderer):
+    """Рендерер для выгрузки в формате TXT."""
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode(self.charset)
+
+
+class CSVRenderer(PlainTextRenderer):
+    """Рендерер для выгрузки в формате CSV."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(PlainTextRenderer):
+    """Рендерер для выгрузки в формате PDF."""
+    media_type = 'application/pdf'
+    format = 'pdf'
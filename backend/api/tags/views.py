@@ -1,10 +1,12 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from tags.models import Tag
+from ..cache import CachedListMixin, VersionedCache
 from .serializers import TagSerializer
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedListMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    list_cache = VersionedCache(Tag)
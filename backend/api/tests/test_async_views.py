@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase
+
+from asgiref.sync import async_to_sync
+
+from api import async_views
+
+
+class PooledStreamTests(SimpleTestCase):
+
+    def setUp(self):
+        self.connection = mock.Mock()
+        self.closed = []
+        self.seen_connections = []
+
+    def generate(self):
+        try:
+            for number in range(10):
+                self.seen_connections.append(connections[DEFAULT_DB_ALIAS])
+                yield f'{number}' * 4
+        finally:
+            self.closed.append(True)
+
+    def read_all(self, stream):
+        chunks = []
+
+        async def run():
+            try:
+                while True:
+                    chunk = await stream.read()
+                    if not chunk:
+                        return
+                    chunks.append(chunk)
+            finally:
+                await stream.close()
+
+        async_to_sync(run)()
+        return chunks
+
+    @mock.patch.object(async_views, 'STREAM_CHUNK_SIZE', 10)
+    def test_reads_bounded_chunks_with_pinned_connection(self):
+        response = StreamingHttpResponse(self.generate())
+        stream = async_views.PooledStream(response, self.connection)
+
+        chunks = self.read_all(stream)
+
+        self.assertEqual(
+            chunks, [b'000011112222', b'333344445555', b'666677778888',
+                     b'9999']
+        )
+        self.assertEqual(self.seen_connections, [self.connection] * 10)
+        self.assertEqual(self.closed, [True])
+        self.connection.close.assert_called_once_with()
+        self.connection.dec_thread_sharing.assert_called_once_with()
+
+    def test_closes_connection_when_reading_fails(self):
+        def generate():
+            yield 'начало'
+            raise ValueError
+
+        stream = async_views.PooledStream(
+            StreamingHttpResponse(generate()), self.connection
+        )
+
+        with self.assertRaises(ValueError):
+            self.read_all(stream)
+
+        self.connection.close.assert_called_once_with()
@@ -0,0 +1,80 @@
+from favorites.models import Favorite
+from recipes.models import Recipe
+from recipes.tests.base import RecipeTestCase, create_recipe
+from shoppingcarts.models import ShoppingCart, ShoppingListItem
+
+
+class BulkTests(RecipeTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipes = [
+            create_recipe(
+                cls.author, f'Рецепт {number}',
+                ingredients=[(cls.ingredient, 100)],
+            )
+            for number in range(3)
+        ]
+
+    def post(self, url, recipe_ids):
+        return self.client.post(url, {'recipes': recipe_ids}, format='json')
+
+    def delete(self, url, recipe_ids):
+        return self.client.delete(url, {'recipes': recipe_ids}, format='json')
+
+    def counters(self, field):
+        return list(
+            Recipe.objects.filter(
+                id__in=[recipe.id for recipe in self.recipes]
+            ).order_by('id').values_list(field, flat=True)
+        )
+
+    def test_bulk_favorite_statuses_and_counters(self):
+        first, second, _ = self.recipes
+        Favorite.objects.create(user=self.user, recipe=first)
+        Recipe.objects.filter(pk=first.pk).update(favorites_count=1)
+
+        response = self.post(
+            '/api/recipes/favorite/bulk/', [first.id, second.id, 999]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [
+            {'id': first.id, 'status': 'already_added'},
+            {'id': second.id, 'status': 'added'},
+            {'id': 999, 'status': 'not_found'},
+        ])
+        self.assertEqual(self.counters('favorites_count'), [1, 1, 0])
+
+        response = self.delete(
+            '/api/recipes/favorite/bulk/', [first.id, self.recipes[2].id]
+        )
+
+        self.assertEqual(response.json(), [
+            {'id': first.id, 'status': 'removed'},
+            {'id': self.recipes[2].id, 'status': 'not_added'},
+        ])
+        self.assertEqual(self.counters('favorites_count'), [0, 1, 0])
+        self.assertEqual(
+            list(Favorite.objects.values_list('recipe_id', flat=True)),
+            [second.id],
+        )
+
+    def test_bulk_cart_updates_shopping_list(self):
+        recipe_ids = [recipe.id for recipe in self.recipes]
+
+        self.post('/api/recipes/shopping_cart/bulk/', recipe_ids)
+        self.post('/api/recipes/shopping_cart/bulk/', recipe_ids)
+
+        self.assertEqual(self.counters('in_carts_count'), [1, 1, 1])
+        self.assertEqual(ShoppingCart.objects.count(), 3)
+        item = ShoppingListItem.objects.get(user=self.user)
+        self.assertEqual(item.amount, 300)
+
+        self.delete('/api/recipes/shopping_cart/bulk/', recipe_ids[:2])
+        self.delete('/api/recipes/shopping_cart/bulk/', recipe_ids[:2])
+
+        self.assertEqual(self.counters('in_carts_count'), [0, 0, 1])
+        item.refresh_from_db()
+        self.assertEqual(item.amount, 100)
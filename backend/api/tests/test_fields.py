@@ -0,0 +1,76 @@
+import base64
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.exceptions import ValidationError
+
+from PIL import Image
+
+from api.fields import BulkPrimaryKeyRelatedField, RecipeImageField
+from tags.models import Tag
+
+
+def make_png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class RecipeImageFieldTests(SimpleTestCase):
+
+    def test_accepts_uploaded_image(self):
+        image = RecipeImageField().to_internal_value(
+            SimpleUploadedFile('image.png', make_png(20, 10))
+        )
+        self.assertEqual(Image.open(image).size, (20, 10))
+
+    def test_rejects_unreadable_upload(self):
+        with self.assertRaises(ValidationError):
+            RecipeImageField().to_internal_value(
+                SimpleUploadedFile('image.png', b'not an image')
+            )
+
+    @override_settings(RECIPE_IMAGE_MAX_DIMENSION=15)
+    def test_rejects_large_dimensions(self):
+        with self.assertRaises(ValidationError):
+            RecipeImageField().to_internal_value(
+                SimpleUploadedFile('image.png', make_png(20, 10))
+            )
+        encoded = base64.b64encode(make_png(20, 10)).decode()
+        with self.assertRaises(ValidationError):
+            RecipeImageField().to_internal_value(
+                f'data:image/png;base64,{encoded}'
+            )
+
+
+class BulkPrimaryKeyRelatedFieldTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag-{number}',
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.field = BulkPrimaryKeyRelatedField(
+            queryset=Tag.objects.all(), many=True
+        )
+
+    def test_loads_objects_in_one_query(self):
+        pks = [str(tag.pk) for tag in reversed(self.tags)]
+
+        with self.assertNumQueries(1):
+            tags = self.field.to_internal_value(pks)
+
+        self.assertEqual(tags, list(reversed(self.tags)))
+
+    def test_rejects_missing_and_invalid_pks(self):
+        for data in ([self.tags[0].pk, 999], ['tag'], [True], 'tag'):
+            with self.subTest(data=data):
+                with self.assertRaises(ValidationError):
+                    self.field.to_internal_value(data)
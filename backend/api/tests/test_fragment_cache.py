@@ -0,0 +1,59 @@
+from django.core.cache import cache
+
+from favorites.models import Favorite
+from recipes.models import Recipe
+from recipes.tests.base import RecipeTestCase, get_client
+
+
+class RecipeFragmentCacheTests(RecipeTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.recipe = self.create_recipe()
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cached_fragment_is_reused(self):
+        self.get()
+        Recipe.objects.filter(pk=self.recipe.pk).update(name='Оладьи')
+
+        # Дата изменения та же, поэтому отдаётся фрагмент из кеша.
+        self.assertEqual(self.get()['name'], 'Блины')
+
+    def test_recipe_update_invalidates_fragment(self):
+        self.get()
+        self.recipe.name = 'Оладьи'
+        self.recipe.save()
+
+        self.assertEqual(self.get()['name'], 'Оладьи')
+
+    def test_related_changes_invalidate_fragment(self):
+        self.get()
+
+        self.ingredient.name = 'мука пшеничная'
+        self.ingredient.save()
+        self.assertEqual(
+            self.get()['ingredients'][0]['name'], 'мука пшеничная'
+        )
+
+        self.tag.name = 'Обед'
+        self.tag.save()
+        self.assertEqual(self.get()['tags'][0]['name'], 'Обед')
+
+        self.author.first_name = 'Пётр'
+        self.author.save()
+        self.assertEqual(self.get()['author']['first_name'], 'Пётр')
+
+    def test_user_fields_are_not_cached(self):
+        self.assertFalse(self.get()['is_favorited'])
+
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+
+        self.assertTrue(self.get()['is_favorited'])
+        other = get_client(self.author)
+        self.assertFalse(other.get(self.url).json()['is_favorited'])
@@ -0,0 +1,47 @@
+from django.test import TestCase, override_settings
+
+from ingredients.models import Ingredient
+from recipes.tests.base import create_user, get_client
+from shoppingcarts.models import ShoppingListItem
+
+
+@override_settings(SQL_STATS_HEADERS=True)
+class QueryStatsMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user('user', first_name='Иван', last_name='Иванов')
+        ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        ShoppingListItem.objects.create(
+            user=cls.user, ingredient=ingredient, amount=100
+        )
+
+    def setUp(self):
+        self.client = get_client(self.user)
+
+    def test_budget_counts_queries_of_streamed_response(self):
+        view_name = 'api:recipes-download-shopping-cart'
+        with override_settings(SQL_QUERY_BUDGETS={view_name: 0}):
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/?format=txt'
+            )
+            self.assertEqual(response['X-DB-Queries'], '0')
+            with self.assertLogs('api.middleware', 'WARNING') as logs:
+                content = b''.join(response.streaming_content)
+
+        self.assertIn('мука', content.decode())
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn(view_name, logs.output[0])
+        self.assertIn('запросов 1 из 0', logs.output[0])
+
+    def test_regular_response_is_checked_immediately(self):
+        with override_settings(SQL_QUERY_BUDGETS={'api:users-me': 0}):
+            with self.assertLogs('api.middleware', 'WARNING') as logs:
+                response = self.client.get('/api/users/me/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-DB-Queries'], str(logs.records[0].args[3])
+        )
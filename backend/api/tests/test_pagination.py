@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.pagination import RecipeCursorPagination
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class RecipeCursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                cooking_time=10, image='recipes/images/test.jpg',
+            )
+            for number in range(7)
+        ]
+        # Одинаковая дата публикации у всех рецептов: порядок задаёт id.
+        cls.pub_date = timezone.now()
+        Recipe.objects.update(pub_date=cls.pub_date)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_ids(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [recipe['id'] for recipe in response.data['results']], response
+
+    def test_pages_cover_all_recipes_with_equal_pub_date(self):
+        ids, response = self.get_ids('/api/recipes/?pagination=cursor&limit=3')
+        collected = list(ids)
+        while response.data['next']:
+            ids, response = self.get_ids(response.data['next'])
+            collected.extend(ids)
+        expected = sorted((recipe.id for recipe in self.recipes), reverse=True)
+        self.assertEqual(collected, expected)
+
+    def test_pages_do_not_shift_after_deletes(self):
+        first, response = self.get_ids(
+            '/api/recipes/?pagination=cursor&limit=3'
+        )
+        Recipe.objects.filter(pk=first[0]).delete()
+        Recipe.objects.create(
+            author=self.author, name='Новый', text='Текст', cooking_time=1,
+            image='recipes/images/test.jpg',
+        )
+        second, _ = self.get_ids(response.data['next'])
+        self.assertEqual(second, [first[-1] - 1, first[-1] - 2, first[-1] - 3])
+
+    def test_previous_link_returns_previous_page(self):
+        first, response = self.get_ids(
+            '/api/recipes/?pagination=cursor&limit=3'
+        )
+        self.assertIsNone(response.data['previous'])
+        _, response = self.get_ids(response.data['next'])
+        previous, response = self.get_ids(response.data['previous'])
+        self.assertEqual(previous, first)
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=bad')
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_with_cursor_is_rejected(self):
+        response = self.client.get(
+            '/api/recipes/?pagination=cursor&search=рецепт'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('search', response.data)
+
+    def explain_page(self, reverse):
+        recipe = self.recipes[3]
+        queryset = RecipeCursorPagination.filter_position(
+            Recipe.objects.order_by(
+                *(('pub_date', 'id') if reverse else ('-pub_date', '-id'))
+            ),
+            recipe.pub_date, recipe.pk, reverse,
+        )[:3]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # На семи строках планировщик иначе выберет Seq Scan.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_cursor_bounds_index_range(self):
+        for reverse, sign in ((False, '<'), (True, '>')):
+            with self.subTest(reverse=reverse):
+                plan = self.explain_page(reverse)
+                if connection.vendor == 'postgresql':
+                    self.assertRegex(
+                        plan, rf'Index Cond: .*pub_date {sign}= '
+                    )
+                else:
+                    self.assertIn(f'(pub_date{sign}?)', plan)
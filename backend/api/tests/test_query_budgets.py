@@ -0,0 +1,84 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from api.middleware import get_query_budget
+from api.profiling import (SAMPLE_PASSWORD, get_sample_context,
+                           get_sample_payloads, iter_api_routes, measure_route)
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe
+from shoppingcarts.models import ShoppingCart
+from tags.models import Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, author = (
+            User.objects.create_user(
+                username=username, email=f'{username}@example.com',
+                password=SAMPLE_PASSWORD, first_name='Имя',
+                last_name='Фамилия',
+            )
+            for username in ('user', 'author')
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag-{number}',
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        for number in range(8):
+            recipe = Recipe.objects.create(
+                author=(cls.user, author)[number % 2],
+                name=f'Рецепт {number}', text='Текст', cooking_time=10,
+                image='recipes/images/test.jpg',
+            )
+            # Рецепты пользователя получают последний тег и ингредиент,
+            # поэтому PUT из проверки меняет и теги, и ингредиенты.
+            recipe.tags.set(tags[-1:] if number % 2 == 0 else tags[:2])
+            for ingredient in ingredients[-2:]:
+                IngredientRecipe.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=100
+                )
+            if number % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscription.objects.create(user=cls.user, following=author)
+
+    def test_routes_fit_query_budgets(self):
+        context = get_sample_context(self.user)
+        payloads = get_sample_payloads(context, self.user)
+        routes = list(iter_api_routes(context))
+        self.assertTrue(routes)
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                for view_name, method, path in routes:
+                    with self.subTest(method=method, path=path):
+                        payload = payloads.get(
+                            f'{method.upper()} {view_name}'
+                        )
+                        status_code, count = measure_route(
+                            view_name, method, path, self.user, payload
+                        )
+                        # Запросы с телом должны проходить валидацию,
+                        # иначе измеряется только путь с ошибкой.
+                        self.assertLess(
+                            status_code, 500 if payload is None else 400
+                        )
+                        self.assertLessEqual(
+                            count, get_query_budget(view_name, method)
+                        )
@@ -0,0 +1,43 @@
+from django.test import TestCase
+
+from recipes.tests.base import create_recipe, create_user, get_client
+from users.models import Subscription
+
+
+class SubscriptionsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.first, cls.second = (
+            create_user(username) for username in ('user', 'first', 'second')
+        )
+        for author, count in ((cls.first, 3), (cls.second, 1)):
+            for number in range(count):
+                create_recipe(author, f'Рецепт {number}')
+
+    def setUp(self):
+        self.client = get_client(self.user)
+
+    def test_no_subscriptions_with_recipes_limit(self):
+        response = self.client.get(
+            '/api/users/subscriptions/?page=1&limit=6&recipes_limit=2'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_recipes_limit_applies_to_each_author(self):
+        for author in (self.first, self.second):
+            Subscription.objects.create(user=self.user, following=author)
+
+        response = self.client.get(
+            '/api/users/subscriptions/?page=1&limit=6&recipes_limit=2'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = {
+            author['id']: author for author in response.json()['results']
+        }
+        self.assertEqual(len(results[self.first.pk]['recipes']), 2)
+        self.assertEqual(results[self.first.pk]['recipes_count'], 3)
+        self.assertEqual(len(results[self.second.pk]['recipes']), 1)
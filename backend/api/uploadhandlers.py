@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """Сохраняет загружаемые файлы во временный файл на диске.
+
+    Данные сверх RECIPE_IMAGE_MAX_SIZE не записываются, но учитываются в
+    размере файла, чтобы сериализатор мог отклонить его с понятной
+    ошибкой.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.RECIPE_IMAGE_MAX_SIZE:
+            self.file.write(raw_data)
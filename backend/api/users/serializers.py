@@ -2,8 +2,9 @@ from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 
+from recipes.images import get_image_variant_urls
 from recipes.models import Recipe
-from users.models import Subscription
+from ..utils import get_following_ids, get_recipes_limit
 
 User = get_user_model()
 
@@ -54,10 +55,13 @@ class CustomUserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        if user.is_anonymous:
+        request = self.context['request']
+        if request.user.is_anonymous:
             return False
-        return Subscription.objects.filter(user=user, following=obj).exists()
+        is_subscribed = getattr(obj, 'is_subscribed', None)
+        if is_subscribed is not None:
+            return is_subscribed
+        return obj.id in get_following_ids(request)
 
 
 class AdvancedCustomUserSerializer(CustomUserSerializer):
@@ -84,10 +88,12 @@ class AdvancedCustomUserSerializer(CustomUserSerializer):
     def get_recipes(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            limit = request.GET.get('recipes_limit')
-            recipes = Recipe.objects.filter(author=obj)
-            if limit:
-                recipes = recipes[:int(limit)]
+            recipes = getattr(obj, 'limited_recipes', None)
+            if recipes is None:
+                recipes = obj.recipes.all()
+                limit = get_recipes_limit(request)
+                if limit is not None:
+                    recipes = recipes[:limit]
             serializer = ShortRecipeSerializer(
                 recipes,
                 many=True,
@@ -99,12 +105,15 @@ class AdvancedCustomUserSerializer(CustomUserSerializer):
     def get_recipes_count(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return Recipe.objects.filter(author=obj).count()
+            return obj.recipes_count
         return 0
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для краткого представления рецепта."""
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
+    )
 
     class Meta:
         model = Recipe
@@ -112,5 +121,9 @@ class ShortRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
+
+    def get_image_variants(self, obj):
+        return get_image_variant_urls(obj, self.context.get('request'))
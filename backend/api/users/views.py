@@ -1,4 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import (BooleanField, F, Prefetch, Value, Window,
+                              prefetch_related_objects)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import status
@@ -6,38 +11,121 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from favorites.models import Favorite
+from recipes.models import Recipe
+from recipes.signals import skip_ingredient_touch, skip_recipes_count
+from shoppingcarts.models import ShoppingCart
 from users.models import Subscription
+from ..recipes.bulk import bulk_remove, detach_recipes
+from ..utils import get_recipes_limit
 from .serializers import AdvancedCustomUserSerializer
 
 User = get_user_model()
 
 
+def delete_subscriptions(user_id):
+    """Удаляет подписки пользователя и на него одним DELETE без сигналов."""
+    table = connection.ops.quote_name(Subscription._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE user_id = %s OR following_id = %s',
+            [user_id, user_id],
+        )
+
+
 class CustomUserViewSet(UserViewSet):
 
     def get_queryset(self):
         if self.action == 'subscriptions':
-            subscriptions = Subscription.objects.filter(user=self.request.user)
-            return [subscription.following for subscription in subscriptions]
+            return User.objects.filter(
+                following__user=self.request.user
+            ).annotate(
+                subscription_id=F('following__id'),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            ).order_by('-subscription_id')
         return super().get_queryset()
 
+    def prefetch_limited_recipes(self, authors):
+        """Загружает последние рецепты авторов страницы одним запросом.
+
+        Рецепты нумеруются ROW_NUMBER() в пределах каждого автора, и в
+        выборку попадают только первые recipes_limit из них.
+        """
+        if not authors:
+            return
+        recipes = Recipe.objects.filter(author__in=authors)
+        limit = get_recipes_limit(self.request)
+        if limit is not None:
+            ranked_sql, params = recipes.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('author_id')],
+                    order_by=[F('pub_date').desc(), F('id').desc()],
+                )
+            ).values('id', 'row_number').query.sql_with_params()
+            recipes = Recipe.objects.filter(id__in=RawSQL(
+                f'SELECT ranked.id FROM ({ranked_sql}) AS ranked '
+                f'WHERE ranked.row_number <= %s',
+                (*params, limit),
+            ))
+        prefetch_related_objects(
+            authors,
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
+
     def get_serializer_class(self):
         if self.action == 'subscriptions':
             return AdvancedCustomUserSerializer
         return super().get_serializer_class()
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        # Подписки, избранное, корзина и рецепты пользователя убираются
+        # заранее, чтобы счётчики и списки покупок менялись одним запросом,
+        # а не после каждой строки каскада. Рецепты удаляются каскадом
+        # вместе с ингредиентами, обновлять их и счётчик рецептов автора
+        # после каждой строки не нужно.
+        User.objects.filter(
+            pk__in=Subscription.objects.filter(
+                user=instance
+            ).values('following_id'),
+            followers_count__gt=0,
+        ).update(followers_count=F('followers_count') - 1)
+        delete_subscriptions(instance.pk)
+        for model in (Favorite, ShoppingCart):
+            bulk_remove(model, instance, list(
+                model.objects.filter(user=instance).values_list(
+                    'recipe_id', flat=True
+                )
+            ))
+        recipe_ids = list(instance.recipes.values_list('pk', flat=True))
+        detach_recipes(recipe_ids)
+        with skip_ingredient_touch(recipe_ids), skip_recipes_count(
+            [instance.pk]
+        ):
+            super().perform_destroy(instance)
+
     @action(
         detail=False,
         methods=['GET'],
         permission_classes=[IsAuthenticated],
     )
     def subscriptions(self, request):
-        return self.list(request)
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        authors = list(queryset) if page is None else page
+        self.prefetch_limited_recipes(authors)
+        serializer = self.get_serializer(authors, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
 
     @action(
         detail=True,
         methods=['POST'],
         permission_classes=[IsAuthenticated]
     )
+    @transaction.atomic
     def subscribe(self, request, id):
         following = get_object_or_404(User, id=id)
         user = request.user
@@ -69,6 +157,7 @@ class CustomUserViewSet(UserViewSet):
         )
 
     @subscribe.mapping.delete
+    @transaction.atomic
     def unsubscribe(self, request, id):
         following = get_object_or_404(User, id=id)
         user = request.user
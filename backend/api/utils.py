@@ -1,13 +1,114 @@
-from recipes.models import Ingredient
+import csv
+import io
+import json
+
+from django.conf import settings
+
+from users.models import Subscription
+
+SHOPPING_CART_TITLE = 'Список покупок'
+SHOPPING_CART_HEADER = ('Ингредиент', 'Единица измерения', 'Количество')
+
+
+class Echo:
+    """Псевдобуфер, возвращающий записанную строку вместо её хранения."""
+    def write(self, value):
+        return value
 
 
 def generate_shopping_cart_text(ingredients_to_buy):
-    shopping_cart_text = 'Список покупок:\n'
+    yield f'{SHOPPING_CART_TITLE}:\n'
+    for item in ingredients_to_buy:
+        yield (
+            f'{item["name"]}'
+            f'({item["measurement_unit"]}) - {item["amount"]}\n'
+        )
+
+
+def generate_shopping_cart_csv(ingredients_to_buy):
+    writer = csv.writer(Echo())
+    yield writer.writerow(SHOPPING_CART_HEADER)
+    for item in ingredients_to_buy:
+        yield writer.writerow(
+            (item['name'], item['measurement_unit'], item['amount'])
+        )
+
+
+def generate_shopping_cart_json(ingredients_to_buy):
+    yield '['
+    for index, item in enumerate(ingredients_to_buy):
+        separator = ',' if index else ''
+        yield separator + json.dumps(item, ensure_ascii=False)
+    yield ']'
+
+
+def generate_shopping_cart_pdf(ingredients_to_buy):
+    """Формирует PDF-документ со списком покупок.
+
+    Формат PDF требует таблицы ссылок в конце файла, поэтому документ
+    собирается целиком и отдаётся одним фрагментом.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    font_name = 'ShoppingCartFont'
+    if font_name not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(
+            TTFont(font_name, settings.SHOPPING_CART_PDF_FONT)
+        )
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    margin, line_height = 50, 18
+    y = height - margin
+    pdf.setFont(font_name, 16)
+    pdf.drawString(margin, y, f'{SHOPPING_CART_TITLE}:')
+    pdf.setFont(font_name, 12)
     for item in ingredients_to_buy:
-        ingredient = Ingredient.objects.get(pk=item['ingredient'])
-        amount = item['amount']
-        shopping_cart_text += (
-            f'{ingredient.name}'
-            f'({ingredient.measurement_unit}) - {amount}\n'
+        y -= line_height
+        if y < margin:
+            pdf.showPage()
+            pdf.setFont(font_name, 12)
+            y = height - margin
+        pdf.drawString(
+            margin,
+            y,
+            f'{item["name"]} ({item["measurement_unit"]}) - {item["amount"]}'
         )
-    return shopping_cart_text
+    pdf.save()
+    yield buffer.getvalue()
+
+
+SHOPPING_CART_GENERATORS = {
+    'txt': generate_shopping_cart_text,
+    'csv': generate_shopping_cart_csv,
+    'json': generate_shopping_cart_json,
+    'pdf': generate_shopping_cart_pdf,
+}
+
+
+def get_following_ids(request):
+    """Возвращает id авторов, на которых подписан текущий пользователь.
+
+    Множество загружается одним запросом и кешируется на объекте запроса,
+    чтобы все сериализаторы в рамках запроса использовали его повторно.
+    """
+    following_ids = getattr(request, '_following_ids', None)
+    if following_ids is None:
+        following_ids = set(
+            Subscription.objects.filter(
+                user=request.user
+            ).values_list('following_id', flat=True)
+        )
+        request._following_ids = following_ids
+    return following_ids
+
+
+def get_recipes_limit(request):
+    """Возвращает значение параметра recipes_limit или None."""
+    limit = request.query_params.get('recipes_limit')
+    if limit is None or not limit.isdigit():
+        return None
+    return int(limit)
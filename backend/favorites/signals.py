@@ -0,0 +1,22 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Recipe
+
+from .models import Favorite
+
+
+@receiver(post_save, sender=Favorite)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F('favorites_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrease_favorites_count(sender, instance, **kwargs):
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favorites_count__gt=0
+    ).update(favorites_count=F('favorites_count') - 1)
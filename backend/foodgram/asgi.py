@@ -1,7 +1,11 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from api.async_views import PooledStreamASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+application = PooledStreamASGIHandler()
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -137,4 +138,70 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=50))
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=300))
+
+LIST_CACHE_TTL = int(os.getenv('LIST_CACHE_TTL', default=300))
+
+LIST_CACHE_MAX_AGE = int(os.getenv('LIST_CACHE_MAX_AGE', default=0))
+
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (160, 160),
+    'card': (480, 480),
+    'full': (1280, 1280),
+}
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=10 * 1024 * 1024)
+)
+
+RECIPE_IMAGE_MAX_DIMENSION = int(
+    os.getenv('RECIPE_IMAGE_MAX_DIMENSION', default=6000)
+)
+
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', default=2))
+
+RECIPE_IMAGE_ASYNC = os.getenv('RECIPE_IMAGE_ASYNC', default='True') == 'True'
+
+SQL_STATS_HEADERS = os.getenv('SQL_STATS_HEADERS', default='False') == 'True'
+
+SQL_QUERY_BUDGET = int(os.getenv('SQL_QUERY_BUDGET', default=10))
+
+SQL_QUERY_BUDGETS = {
+    # Запись рецепта занимает 17-23 запроса и не зависит от числа его
+    # тегов и ингредиентов.
+    'POST api:recipes-list': 25,
+    'PUT api:recipes-detail': 30,
+    'PATCH api:recipes-detail': 30,
+    'DELETE api:recipes-detail': 20,
+    # Каскад удаления пользователя проходит по всем связанным таблицам, но
+    # число запросов не зависит от количества его рецептов и подписок.
+    'DELETE api:users-me': 50,
+    'DELETE api:users-detail': 50,
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+RECIPE_FRAGMENT_TTL = int(os.getenv('RECIPE_FRAGMENT_TTL', default=3600))
+
+# Включается в foodgram/asgi.py: чтение рецептов и ингредиентов выполняется
+# асинхронными представлениями в пуле из ASYNC_VIEWS_THREADS потоков.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
+ASYNC_VIEWS_THREADS = int(os.getenv('ASYNC_VIEWS_THREADS', default=8))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,212 @@
+import csv
+import io
+import itertools
+import json
+import re
+
+from django.db import connection
+
+from .models import Ingredient
+
+MAX_LENGTH = 200
+READ_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s*')
+DELIMITERS = ' \t\r\n,]'
+
+
+def read_csv(file):
+    """Строки вида «название,единица измерения» без заголовка."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def get_fields(item):
+    fields = item.get('fields', item)
+    return fields['name'], fields['measurement_unit']
+
+
+def skip_separator(char, expected):
+    """Что ожидать после символа char: скобки, запятой или значения."""
+    if expected == '[':
+        if char != '[':
+            raise ValueError('Файл JSON должен содержать список.')
+        return 'first'
+    if char == ']' and expected in ('first', ','):
+        return ']'
+    if expected == ',':
+        if char != ',':
+            raise ValueError('Элементы списка JSON разделяются запятой.')
+        return 'value'
+    return None
+
+
+def iter_json_array(file, chunk_size=READ_CHUNK_SIZE):
+    """Отдаёт элементы JSON-массива по одному, читая файл порциями."""
+    decoder = json.JSONDecoder()
+    buffer, position, finished, expected = '', 0, False, '['
+    while expected != ']':
+        position = WHITESPACE.match(buffer, position).end()
+        item = end = None
+        if position < len(buffer):
+            following = skip_separator(buffer[position], expected)
+            if following:
+                position, expected = position + 1, following
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                pass
+        # Число в конце буфера может быть обрезано: 1.5 вместо 1.5e3,
+        # поэтому значение принимается, только если за ним есть разделитель.
+        if end is not None and (
+            finished or end < len(buffer) and buffer[end] in DELIMITERS
+        ):
+            yield item
+            position, expected = end, ','
+            continue
+        if finished:
+            raise ValueError('Файл JSON обрывается или содержит ошибку.')
+        chunk = file.read(chunk_size)
+        finished = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def read_json(file):
+    """Список объектов с name и measurement_unit или фикстура Django."""
+    for item in iter_json_array(file):
+        yield get_fields(item)
+
+
+def read_json_lines(file):
+    """По одному объекту с name и measurement_unit на строку."""
+    for line in file:
+        if line.strip():
+            yield get_fields(json.loads(line))
+
+
+def normalize(rows):
+    """Убирает лишние пробелы и пропускает неполные строки."""
+    for name, measurement_unit in rows:
+        name = ' '.join(name.split())[:MAX_LENGTH]
+        measurement_unit = ' '.join(measurement_unit.split())[:MAX_LENGTH]
+        if name and measurement_unit:
+            yield name, measurement_unit
+
+
+def get_key(name, measurement_unit):
+    return name.lower(), measurement_unit.lower()
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_ingredients(rows, batch_size=5000):
+    """Добавляет и обновляет ингредиенты по (название, единица).
+
+    Сопоставление не зависит от регистра, у совпавших ингредиентов
+    обновляется написание. Сигналы не отправляются. Возвращает словарь
+    с количеством inserted/updated/unchanged и список id обновлённых
+    ингредиентов. Вызывать внутри transaction.atomic().
+    """
+    rows = normalize(rows)
+    if connection.vendor == 'postgresql':
+        return _copy_import(rows, batch_size)
+    return _batched_import(rows, batch_size)
+
+
+def _batched_import(rows, batch_size):
+    existing = {
+        get_key(name, measurement_unit): (pk, name, measurement_unit)
+        for pk, name, measurement_unit in Ingredient.objects.order_by(
+            '-pk'
+        ).values_list('pk', 'name', 'measurement_unit')
+    }
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    updated_ids, seen = [], set()
+    for batch in batches(rows, batch_size):
+        to_create, to_update = [], []
+        for name, measurement_unit in batch:
+            key = get_key(name, measurement_unit)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key not in existing:
+                to_create.append(Ingredient(
+                    name=name, measurement_unit=measurement_unit
+                ))
+            elif existing[key][1:] != (name, measurement_unit):
+                to_update.append(Ingredient(
+                    pk=existing[key][0],
+                    name=name,
+                    measurement_unit=measurement_unit,
+                ))
+            else:
+                counts['unchanged'] += 1
+        Ingredient.objects.bulk_create(to_create)
+        Ingredient.objects.bulk_update(to_update, ['name', 'measurement_unit'])
+        counts['inserted'] += len(to_create)
+        counts['updated'] += len(to_update)
+        updated_ids.extend(ingredient.pk for ingredient in to_update)
+    return counts, updated_ids
+
+
+def _copy_import(rows, batch_size):
+    """Импорт через COPY во временную таблицу и два запроса в PostgreSQL."""
+    table = connection.ops.quote_name(Ingredient._meta.db_table)
+    same_key = (
+        'lower(ingredient.name) = lower(source.name) AND '
+        'lower(ingredient.measurement_unit) = lower(source.measurement_unit)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_import ('
+            'position serial, name varchar(200) NOT NULL, '
+            'measurement_unit varchar(200) NOT NULL) ON COMMIT DROP'
+        )
+        for batch in batches(rows, batch_size):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(
+                'COPY ingredient_import (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+        # Из повторяющихся строк файла остаётся первая.
+        cursor.execute(
+            'CREATE TEMPORARY TABLE ingredient_import_unique ON COMMIT DROP '
+            'AS SELECT DISTINCT ON (lower(name), lower(measurement_unit)) '
+            'name, measurement_unit FROM ingredient_import '
+            'ORDER BY lower(name), lower(measurement_unit), position'
+        )
+        total = cursor.rowcount
+        cursor.execute(
+            f'UPDATE {table} AS ingredient '
+            f'SET name = source.name, '
+            f'measurement_unit = source.measurement_unit '
+            f'FROM ingredient_import_unique AS source '
+            f'WHERE {same_key} AND (ingredient.name <> source.name OR '
+            f'ingredient.measurement_unit <> source.measurement_unit) '
+            f'RETURNING ingredient.id'
+        )
+        updated_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f'INSERT INTO {table} (name, measurement_unit) '
+            f'SELECT source.name, source.measurement_unit '
+            f'FROM ingredient_import_unique AS source '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {table} AS ingredient '
+            f'WHERE {same_key})'
+        )
+        inserted = cursor.rowcount
+    return {
+        'inserted': inserted,
+        'updated': len(updated_ids),
+        'unchanged': max(total - inserted - len(updated_ids), 0),
+    }, updated_ids
@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ingredients.models import Ingredient
+from ingredients.search import ingredient_index
+
+DEFAULT_PREFIXES = ('а', 'кар', 'мол', 'сыр', 'т', 'яблоч', 'xyz')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость поиска ингредиентов по началу названия '
+        'через ORM и через индекс в памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefixes',
+            nargs='*',
+            default=DEFAULT_PREFIXES,
+            help='Префиксы для поиска.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Количество повторов для каждого префикса.',
+        )
+
+    def measure(self, search, prefixes, repeat):
+        timings = []
+        for prefix in prefixes:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                search(prefix)
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        return (
+            statistics.mean(timings) * 1e6,
+            timings[int(len(timings) * 0.95) - 1] * 1e6,
+        )
+
+    def handle(self, *args, **options):
+        prefixes, repeat = options['prefixes'], options['repeat']
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+
+        def orm_search(prefix):
+            return list(
+                Ingredient.objects.filter(
+                    name__istartswith=prefix
+                ).values('id', 'name', 'measurement_unit')[:limit]
+            )
+
+        for prefix in prefixes:
+            index_ids = [row['id'] for row in ingredient_index.search(prefix)]
+            orm_ids = [row['id'] for row in orm_search(prefix)]
+            if sorted(index_ids) != sorted(orm_ids):
+                self.stderr.write(
+                    f'Результаты для "{prefix}" различаются: '
+                    f'индекс {len(index_ids)}, ORM {len(orm_ids)}'
+                )
+
+        started = time.perf_counter()
+        ingredient_index.build()
+        build_time = (time.perf_counter() - started) * 1e3
+        self.stdout.write(
+            f'Ингредиентов: {Ingredient.objects.count()}, '
+            f'построение индекса: {build_time:.1f} мс'
+        )
+        for name, search in (
+            ('ORM', orm_search),
+            ('Индекс', ingredient_index.search),
+        ):
+            mean, p95 = self.measure(search, prefixes, repeat)
+            self.stdout.write(
+                f'{name}: среднее {mean:.1f} мкс, p95 {p95:.1f} мкс'
+            )
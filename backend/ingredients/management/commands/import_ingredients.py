@@ -0,0 +1,66 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ingredients.importer import (import_ingredients, read_csv, read_json,
+                                  read_json_lines)
+from ingredients.search import ingredient_index
+from recipes.signals import touch_recipes_with_ingredients
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_json_lines,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает каталог ингредиентов из CSV, JSON или JSON Lines: '
+        'добавляет новые и обновляет существующие по названию и единице '
+        'измерения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к файлу CSV, JSON или JSON Lines.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=READERS,
+            help='Формат файла. По умолчанию определяется по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Количество строк в одном пакете.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (
+            options['format'] or os.path.splitext(path)[1][1:].lower()
+        )
+        if file_format not in READERS:
+            raise CommandError(
+                f'Неизвестный формат файла: {file_format or path}'
+            )
+        started = time.perf_counter()
+        with open(path, encoding='utf-8', newline='') as file:
+            with transaction.atomic():
+                counts, updated_ids = import_ingredients(
+                    READERS[file_format](file), options['batch_size']
+                )
+                # Импорт не отправляет сигналы, поэтому рецепты с
+                # переименованными ингредиентами обновляются здесь.
+                touch_recipes_with_ingredients(updated_ids)
+        ingredient_index.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f'Добавлено: {counts["inserted"]}, '
+            f'обновлено: {counts["updated"]}, '
+            f'без изменений: {counts["unchanged"]} '
+            f'за {time.perf_counter() - started:.1f} с'
+        ))
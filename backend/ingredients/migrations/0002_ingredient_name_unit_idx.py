@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:18
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(django.db.models.functions.text.Lower('name'), django.db.models.functions.text.Lower('measurement_unit'), name='ingredient_name_unit_idx'),
+        ),
+    ]
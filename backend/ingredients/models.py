@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Ingredient(models.Model):
@@ -15,6 +16,13 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        indexes = (
+            models.Index(
+                Lower('name'),
+                Lower('measurement_unit'),
+                name='ingredient_name_unit_idx',
+            ),
+        )
 
     def __str__(self):
         return self.name
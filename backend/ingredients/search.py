@@ -0,0 +1,59 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .models import Ingredient
+
+
+class IngredientPrefixIndex:
+    """Индекс ингредиентов в памяти для поиска по началу названия.
+
+    Хранит отсортированный массив названий в нижнем регистре и находит
+    совпадения двоичным поиском, не обращаясь к базе данных. Индекс
+    строится при первом обращении и перестраивается после изменения
+    ингредиентов или по истечении INGREDIENT_INDEX_TTL секунд, чтобы
+    изменения из других процессов тоже становились видны.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def build(self):
+        rows = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda row: (row['name'].casefold(), row['id'])
+        )
+        keys = [row['name'].casefold() for row in rows]
+        self._snapshot = (keys, rows, time.monotonic())
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or (
+            time.monotonic() - snapshot[2] > settings.INGREDIENT_INDEX_TTL
+        ):
+            with self._lock:
+                if self._snapshot is snapshot:
+                    self.build()
+                snapshot = self._snapshot
+        return snapshot
+
+    def search(self, prefix, limit=None):
+        if limit is None:
+            limit = settings.INGREDIENT_SEARCH_LIMIT
+        keys, rows, _ = self._get_snapshot()
+        prefix = prefix.casefold()
+        result = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            if len(result) >= limit or not keys[position].startswith(prefix):
+                break
+            result.append(rows[position])
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredient
+from .search import ingredient_index
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
@@ -0,0 +1,130 @@
+import io
+import json
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ingredients import importer
+from ingredients.models import Ingredient
+
+ROWS = [
+    ('Мука', 'г'),
+    ('соль', 'г'),
+    ('сахар', 'г'),
+    ('САХАР', 'Г'),
+    ('  яйца ', 'шт'),
+    ('', 'г'),
+]
+
+
+class ReadJSONTests(SimpleTestCase):
+
+    def test_reads_array_in_small_chunks(self):
+        items = [
+            {'model': 'ingredients.ingredient',
+             'fields': {'name': 'мука', 'measurement_unit': 'г'}},
+            {'name': 'соль, [крупная]', 'measurement_unit': 'г'},
+            12345,
+            -1.5e3,
+            [1, [2]],
+            None,
+        ]
+        text = '\n[ ' + ',\n  '.join(
+            json.dumps(item, ensure_ascii=False) for item in items
+        ) + ' ]\n'
+
+        for chunk_size in range(1, 12):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    list(importer.iter_json_array(
+                        io.StringIO(text), chunk_size
+                    )),
+                    items,
+                )
+        self.assertEqual(
+            list(importer.read_json(
+                io.StringIO(json.dumps(items[:2], ensure_ascii=False))
+            )),
+            [('мука', 'г'), ('соль, [крупная]', 'г')],
+        )
+
+    def test_empty_array(self):
+        self.assertEqual(
+            list(importer.iter_json_array(io.StringIO(' [ ] '), 1)), []
+        )
+
+    def test_invalid_json(self):
+        for text in ('', '{}', '[1,', '[1 2]', '[1,]', '[{"name": 1'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    list(importer.iter_json_array(io.StringIO(text), 2))
+
+    def test_reads_json_lines(self):
+        text = (
+            '{"name": "мука", "measurement_unit": "г"}\n'
+            '\n'
+            '{"fields": {"name": "соль", "measurement_unit": "г"}}\n'
+        )
+
+        self.assertEqual(
+            list(importer.read_json_lines(io.StringIO(text))),
+            [('мука', 'г'), ('соль', 'г')],
+        )
+
+
+class ImportScenarioMixin:
+    """Один сценарий импорта для обоих способов загрузки."""
+
+    def run_import(self, rows):
+        raise NotImplementedError
+
+    def test_import(self):
+        flour = Ingredient.objects.create(name='мука', measurement_unit='г')
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+
+        counts, updated_ids = self.run_import(ROWS)
+
+        self.assertEqual(
+            counts, {'inserted': 2, 'updated': 1, 'unchanged': 1}
+        )
+        self.assertEqual(updated_ids, [flour.pk])
+        self.assertEqual(
+            sorted(Ingredient.objects.values_list(
+                'name', 'measurement_unit'
+            )),
+            [('Мука', 'г'), ('сахар', 'г'), ('соль', 'г'), ('яйца', 'шт')],
+        )
+
+
+class BatchedImportTests(ImportScenarioMixin, TestCase):
+
+    def run_import(self, rows):
+        return importer._batched_import(importer.normalize(rows), 2)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY есть только в PostgreSQL')
+class CopyImportTests(ImportScenarioMixin, TestCase):
+
+    def run_import(self, rows):
+        return importer._copy_import(importer.normalize(rows), 2)
+
+
+class ImportCommandTests(TestCase):
+
+    def test_imports_json_lines_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ingredients.jsonl')
+            with open(path, 'w', encoding='utf-8') as file:
+                for name, measurement_unit in ROWS:
+                    file.write(json.dumps({
+                        'name': name, 'measurement_unit': measurement_unit
+                    }) + '\n')
+            output = io.StringIO()
+            call_command('import_ingredients', path, stdout=output)
+
+        self.assertIn('Добавлено: 4, обновлено: 0', output.getvalue())
+        self.assertEqual(Ingredient.objects.count(), 4)
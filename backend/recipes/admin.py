@@ -1,6 +1,9 @@
 from django.contrib import admin
 
+from shoppingcarts.shopping_lists import update_shopping_lists
+
 from .models import IngredientRecipe, Recipe
+from .signals import skip_ingredient_touch
 
 
 class IngredientInline(admin.TabularInline):
@@ -28,9 +31,26 @@ class RecipeAdmin(admin.ModelAdmin):
         'tags',
     )
 
+    def save_related(self, request, form, formsets, change):
+        # Ингредиенты из инлайна сохраняются здесь, поэтому списки
+        # покупок с этим рецептом пересчитываются вокруг сохранения.
+        if change:
+            update_shopping_lists([form.instance.pk], -1)
+        super().save_related(request, form, formsets, change)
+        if change:
+            update_shopping_lists([form.instance.pk], 1)
+
+    def delete_model(self, request, obj):
+        with skip_ingredient_touch([obj.pk]):
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with skip_ingredient_touch(queryset.values_list('pk', flat=True)):
+            super().delete_queryset(request, queryset)
+
     @admin.display(description='Добавлено в избранное')
     def get_favorite_recipe_count(self, obj):
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
 
 @admin.register(IngredientRecipe)
@@ -0,0 +1,45 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_related(model, field):
+    """Подзапрос с количеством строк model, ссылающихся на объект."""
+    return Coalesce(
+        Subquery(
+            model._default_manager.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def recount_recipe_counters(recipes, favorite_model, shopping_cart_model):
+    return recipes.update(
+        favorites_count=count_related(favorite_model, 'recipe'),
+        in_carts_count=count_related(shopping_cart_model, 'recipe'),
+    )
+
+
+def recount_user_counters(users, recipe_model, subscription_model):
+    return users.update(
+        recipes_count=count_related(recipe_model, 'author'),
+        followers_count=count_related(subscription_model, 'following'),
+    )
+
+
+def get_update_fields(instance, excluded_fields, update_fields=None):
+    """Поля для полного save() без счётчиков и других вычисляемых полей.
+
+    Такие поля меняются только отдельными запросами, поэтому save() не
+    должен записывать поверх них значения, загруженные вместе с объектом.
+    """
+    if update_fields is not None or instance._state.adding:
+        return update_fields
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in excluded_fields
+    ]
@@ -0,0 +1,144 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from PIL import Image
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix='recipe-images',
+        )
+    return _executor
+
+
+def save_variant(image, path, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **options)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    return default_storage.save(path, ContentFile(buffer.getvalue()))
+
+
+def build_image_variants(source_name):
+    """Создаёт уменьшенные копии изображения и их версии в WebP.
+
+    Возвращает словарь с путями к файлам в хранилище. Исходное имя
+    сохраняется под ключом source, чтобы отличать устаревшие варианты.
+    """
+    with default_storage.open(source_name) as source:
+        original = Image.open(source)
+        original.load()
+    has_alpha = original.mode in ('RGBA', 'LA', 'P')
+    original = original.convert('RGBA' if has_alpha else 'RGB')
+    image_format, extension = ('PNG', 'png') if has_alpha else ('JPEG', 'jpg')
+
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    variants = {'source': source_name}
+    for name, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        path = os.path.join(directory, 'variants', f'{stem}_{name}')
+        variants[name] = save_variant(
+            image, f'{path}.{extension}', image_format, optimize=True
+        )
+        variants[f'{name}_webp'] = save_variant(
+            image, f'{path}.webp', 'WEBP', quality=80
+        )
+    return variants
+
+
+def delete_variant_files(variants, keep):
+    """Удаляет файлы вариантов, кроме исходного изображения и keep."""
+    for name, path in variants.items():
+        if name != 'source' and path not in keep:
+            default_storage.delete(path)
+
+
+def save_image_variants(recipe_id, source_name, variants):
+    """Сохраняет варианты, если изображение рецепта не сменилось.
+
+    После фиксации транзакции удаляются файлы прежних вариантов, а если
+    изображение успели заменить, то только что созданные.
+    """
+    with transaction.atomic():
+        current = Recipe.objects.select_for_update().filter(
+            pk=recipe_id
+        ).values_list('image', 'image_variants').first()
+        if current is not None and current[0] == source_name:
+            Recipe.objects.filter(pk=recipe_id).update(
+                image_variants=variants, updated_at=timezone.now()
+            )
+            stale, keep = current[1], variants
+        else:
+            stale, keep = variants, current[1] if current else {}
+        transaction.on_commit(
+            lambda: delete_variant_files(stale, set(keep.values()))
+        )
+
+
+def generate_image_variants(recipe_id):
+    try:
+        source_name = Recipe.objects.filter(
+            pk=recipe_id
+        ).values_list('image', flat=True).first()
+        if not source_name:
+            return
+        save_image_variants(
+            recipe_id, source_name, build_image_variants(source_name)
+        )
+    except Exception:
+        logger.exception(
+            'Не удалось создать варианты изображения рецепта %s', recipe_id
+        )
+    finally:
+        if settings.RECIPE_IMAGE_ASYNC:
+            connection.close()
+
+
+def schedule_image_variants(recipe):
+    """Ставит в очередь создание вариантов, если изображение изменилось."""
+    if not recipe.image or (
+        recipe.image_variants.get('source') == recipe.image.name
+    ):
+        return
+    if settings.RECIPE_IMAGE_ASYNC:
+        get_executor().submit(generate_image_variants, recipe.pk)
+    else:
+        generate_image_variants(recipe.pk)
+
+
+def get_image_variant_urls(recipe, request=None):
+    """Возвращает ссылки на варианты изображения рецепта.
+
+    Пока варианты не созданы, вместо каждого из них отдаётся оригинал.
+    """
+    if not recipe.image:
+        return {}
+    variants = recipe.image_variants
+    if variants.get('source') != recipe.image.name:
+        variants = {}
+    urls = {}
+    for name in settings.RECIPE_IMAGE_VARIANTS:
+        for key in (name, f'{name}_webp'):
+            path = variants.get(key)
+            url = default_storage.url(path) if path else recipe.image.url
+            urls[key] = request.build_absolute_uri(url) if request else url
+    return urls
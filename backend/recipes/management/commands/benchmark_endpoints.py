@@ -0,0 +1,128 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from api.profiling import (BENCHMARK_ENDPOINTS, capture_queries,
+                           get_sample_context, get_sample_user, percentile)
+from recipes.models import Recipe
+
+User = get_user_model()
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kb')
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет перцентили времени ответа, число SQL-запросов и пиковую '
+        'память основных эндпоинтов и сохраняет результаты в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'endpoints',
+            nargs='*',
+            help=f'Эндпоинты: {", ".join(BENCHMARK_ENDPOINTS)}. '
+                 f'По умолчанию все.',
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого выполняются запросы.',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark-results.json',
+            help='Файл для сохранения результатов.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Файл с результатами предыдущего запуска для сравнения.',
+        )
+
+    def measure(self, path, user, repeat):
+        capture_queries(path, user)
+        timings, queries = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response, executed = capture_queries(path, user)
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f'{path}: ответ {response.status_code}')
+            queries = max(queries, len(executed))
+        # tracemalloc замедляет выполнение, поэтому память измеряется
+        # отдельным запросом.
+        tracemalloc.start()
+        capture_queries(path, user)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        timings.sort()
+        return {
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 0.5), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'p99_ms': round(percentile(timings, 0.99), 3),
+            'queries': queries,
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def compare(self, results, previous_path):
+        with open(previous_path, encoding='utf-8') as file:
+            previous = json.load(file)['endpoints']
+        for name, metrics in results.items():
+            if name not in previous:
+                continue
+            changes = []
+            for metric in METRICS:
+                before, after = previous[name][metric], metrics[metric]
+                change = (after - before) / before * 100 if before else 0
+                changes.append(f'{metric} {before} → {after} ({change:+.0f}%)')
+            self.stdout.write(f'{name}: ' + ', '.join(changes))
+
+    def handle(self, *args, **options):
+        names = options['endpoints'] or list(BENCHMARK_ENDPOINTS)
+        unknown = set(names) - set(BENCHMARK_ENDPOINTS)
+        if unknown:
+            raise CommandError(f'Неизвестные эндпоинты: {", ".join(unknown)}')
+        user = get_sample_user(options['user'])
+        context = get_sample_context(user)
+        if context is None:
+            raise CommandError(
+                'В базе нет данных, запустите generate_load_data.'
+            )
+        results = {}
+        for name in names:
+            path = BENCHMARK_ENDPOINTS[name].format(**context)
+            results[name] = self.measure(path, user, options['repeat'])
+            metrics = results[name]
+            self.stdout.write(
+                f'{name}: p50 {metrics["p50_ms"]} мс, '
+                f'p95 {metrics["p95_ms"]} мс, p99 {metrics["p99_ms"]} мс, '
+                f'запросов {metrics["queries"]}, '
+                f'память {metrics["peak_memory_kb"]} КБ'
+            )
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(
+                {
+                    'created_at': timezone.now().isoformat(),
+                    'database': connection.vendor,
+                    'users': User.objects.count(),
+                    'recipes': Recipe.objects.count(),
+                    'repeat': options['repeat'],
+                    'endpoints': results,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+        if options['compare']:
+            self.compare(results, options['compare'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,239 @@
+import asyncio
+import itertools
+import json
+import socket
+import time
+from urllib.parse import quote, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.profiling import (BENCHMARK_ENDPOINTS, get_sample_context,
+                           get_sample_user, percentile)
+
+ASYNC_ENDPOINTS = (
+    'recipe_list',
+    'recipe_detail',
+    'ingredient_search',
+    'download_shopping_cart',
+)
+
+
+def parse_target(value):
+    name, _, url = value.partition('=')
+    parts = urlsplit(url)
+    if not parts.hostname:
+        raise CommandError(
+            f'Цель {value!r} должна иметь вид имя=http://хост:порт'
+        )
+    return name, parts.hostname, parts.port or 80
+
+
+def build_request(host, path, token):
+    return (
+        f'GET {quote(path, safe="/?&=")} HTTP/1.1\r\n'
+        f'Host: {host}\r\n'
+        f'Authorization: Token {token}\r\n'
+        f'Accept: */*\r\n'
+        f'Connection: close\r\n'
+        f'\r\n'
+    ).encode()
+
+
+async def open_connection(host, port, receive_buffer=None):
+    """Соединение с сервером, при receive_buffer с маленьким буфером."""
+    if receive_buffer is None:
+        return await asyncio.open_connection(host, port)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(
+        sock, (socket.gethostbyname(host), port)
+    )
+    return await asyncio.open_connection(sock=sock, limit=receive_buffer)
+
+
+async def fetch(host, port, request):
+    reader, writer = await open_connection(host, port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1])
+
+
+async def slow_client(host, port, request, delay, chunk_size):
+    """Отправляет запрос по строке и читает ответ маленькими порциями."""
+    while True:
+        reader, writer = await open_connection(host, port, chunk_size)
+        try:
+            for line in request.splitlines(keepends=True):
+                writer.write(line)
+                await writer.drain()
+                await asyncio.sleep(delay)
+            while await reader.read(chunk_size):
+                await asyncio.sleep(delay)
+        except OSError:
+            await asyncio.sleep(delay)
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает задержку и пропускную способность запущенных серверов '
+        '(например, WSGI и ASGI) при одновременной нагрузке медленными '
+        'клиентами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='+',
+            help='Серверы в виде имя=http://хост:порт, например '
+                 'wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001.',
+        )
+        parser.add_argument(
+            '--slow-clients', type=int, default=50,
+            help='Число медленных клиентов.',
+        )
+        parser.add_argument(
+            '--slow-delay', type=float, default=0.5,
+            help='Пауза медленного клиента между порциями, секунд.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1024,
+            help='Размер порции, которую читает медленный клиент.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Число обычных запросов к каждому серверу.',
+        )
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument(
+            '--timeout', type=float, default=10,
+            help='Время ожидания обычного запроса, секунд.',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого выполняются запросы.',
+        )
+        parser.add_argument(
+            '--output',
+            default='slow-clients-results.json',
+            help='Файл для сохранения результатов.',
+        )
+
+    async def probe(self, host, port, requests, options):
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        timings, errors = [], 0
+
+        async def run(request):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        fetch(host, port, request), options['timeout']
+                    )
+                except (asyncio.TimeoutError, OSError, IndexError,
+                        ValueError):
+                    status = None
+                if status is None or status >= 400:
+                    errors += 1
+                else:
+                    timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(request) for request in requests))
+        return timings, errors, time.perf_counter() - started
+
+    async def measure(self, host, port, requests, slow_request, options):
+        slow_clients = [
+            asyncio.ensure_future(slow_client(
+                host,
+                port,
+                slow_request,
+                options['slow_delay'],
+                options['chunk_size'],
+            ))
+            for _ in range(options['slow_clients'])
+        ]
+        try:
+            # Медленные клиенты успевают занять соединения до замера.
+            await asyncio.sleep(options['slow_delay'] * 2)
+            timings, errors, elapsed = await self.probe(
+                host, port, requests, options
+            )
+        finally:
+            for client in slow_clients:
+                client.cancel()
+            await asyncio.gather(*slow_clients, return_exceptions=True)
+        timings.sort()
+        result = {
+            'requests': len(requests),
+            'errors': errors,
+            'rps': round(len(timings) / elapsed, 1),
+        }
+        for name, share in (('p50_ms', 0.5), ('p95_ms', 0.95),
+                            ('p99_ms', 0.99)):
+            result[name] = (
+                round(percentile(timings, share), 1) if timings else None
+            )
+        return result
+
+    def handle(self, *args, **options):
+        targets = [parse_target(value) for value in options['targets']]
+        user = get_sample_user(options['user'])
+        context = get_sample_context(user)
+        if context is None:
+            raise CommandError(
+                'В базе нет данных, запустите generate_load_data.'
+            )
+        token = Token.objects.get_or_create(user=user)[0].key
+        paths = [
+            BENCHMARK_ENDPOINTS[name].format(**context)
+            for name in ASYNC_ENDPOINTS
+        ]
+        results = {}
+        for name, host, port in targets:
+            requests = [
+                build_request(host, path, token)
+                for path in itertools.islice(
+                    itertools.cycle(paths), options['requests']
+                )
+            ]
+            slow_request = build_request(
+                host, BENCHMARK_ENDPOINTS['download_shopping_cart'], token
+            )
+            results[name] = asyncio.run(self.measure(
+                host, port, requests, slow_request, options
+            ))
+            metrics = results[name]
+            self.stdout.write(
+                f'{name}: {metrics["rps"]} запросов/с, '
+                f'p50 {metrics["p50_ms"]} мс, p95 {metrics["p95_ms"]} мс, '
+                f'p99 {metrics["p99_ms"]} мс, '
+                f'ошибок {metrics["errors"]} из {metrics["requests"]}'
+            )
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(
+                {
+                    'created_at': timezone.now().isoformat(),
+                    'slow_clients': options['slow_clients'],
+                    'slow_delay': options['slow_delay'],
+                    'concurrency': options['concurrency'],
+                    'targets': results,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты сохранены в {options["output"]}'
+        ))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Recipe
+from recipes.snapshots import (build_ingredient_snapshots,
+                               update_ingredient_snapshots)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет снимки ингредиентов рецептов с таблицей ингредиентов '
+        'рецептов и при --fix исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Перезаписать устаревшие снимки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество рецептов в одном пакете.',
+        )
+
+    def find_stale(self, batch):
+        snapshots = build_ingredient_snapshots(batch)
+        return [
+            recipe_id
+            for recipe_id, stored in Recipe.objects.filter(
+                pk__in=batch
+            ).values_list('pk', 'ingredients_snapshot')
+            if stored != snapshots[recipe_id]
+        ]
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        stale = []
+        for start in range(0, len(ids), batch_size):
+            batch = self.find_stale(ids[start:start + batch_size])
+            if batch and options['fix']:
+                with transaction.atomic():
+                    update_ingredient_snapshots(batch)
+            stale.extend(batch)
+        if stale and not options['fix']:
+            raise CommandError(
+                f'Устаревшие снимки ингредиентов у рецептов: '
+                f'{", ".join(map(str, stale))}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено рецептов: {len(ids)}, исправлено: {len(stale)}'
+        ))
@@ -0,0 +1,70 @@
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from api.middleware import get_query_budget
+from api.profiling import (SAMPLE_PASSWORD, get_sample_context,
+                           get_sample_payloads, get_sample_user,
+                           iter_api_routes, measure_route)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет запросы ко всем маршрутам api/urls.py и завершается с '
+        'ошибкой, если число SQL-запросов превышает бюджет представления. '
+        'Запросы изменения данных отправляются с корректными телами, '
+        'изменения в базе откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого выполняются запросы.',
+        )
+
+    def handle(self, *args, **options):
+        user = get_sample_user(options['user'])
+        context = get_sample_context(user)
+        if context is None:
+            raise CommandError(
+                'В базе нет рецептов, тегов или ингредиентов для проверки.'
+            )
+        # Файлы изображений и письма из проверочных запросов не должны
+        # оставаться после отката.
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ), transaction.atomic():
+            user.set_password(SAMPLE_PASSWORD)
+            user.save(update_fields=['password'])
+            failures = self.check_routes(
+                user, context, get_sample_payloads(context, user)
+            )
+            transaction.set_rollback(True)
+        if failures:
+            raise CommandError(
+                f'Бюджет SQL-запросов превышен в {len(failures)} маршрутах.'
+            )
+        self.stdout.write(self.style.SUCCESS('Бюджеты запросов соблюдены.'))
+
+    def check_routes(self, user, context, payloads):
+        failures = []
+        for view_name, method, path in iter_api_routes(context):
+            status_code, count = measure_route(
+                view_name, method, path, user,
+                payloads.get(f'{method.upper()} {view_name}'),
+            )
+            budget = get_query_budget(view_name, method)
+            line = (
+                f'{method.upper()} {path} ({view_name}): {status_code}, '
+                f'запросов {count} из {budget}'
+            )
+            if count > budget:
+                failures.append(line)
+                self.stderr.write(line)
+            else:
+                self.stdout.write(line)
+        return failures
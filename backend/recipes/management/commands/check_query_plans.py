@@ -0,0 +1,126 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.profiling import (capture_queries, get_endpoint_paths,
+                           get_sample_context, get_sample_user)
+
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+SQLITE_SCAN_PATTERN = re.compile(r'\bSCAN (?:TABLE )?(\w+)\b(?! USING)')
+# Если условие оставляет хотя бы такую долю строк таблицы, индекс чтение
+# не ускорит, и полный просмотр таблицы ошибкой не считается.
+NON_SELECTIVE_SHARE = 0.5
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from iter_plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для SQL-запросов основных эндпоинтов API и '
+        'завершается с ошибкой, если большая таблица читается целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого выполняются запросы.',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10000,
+            help='Таблицы с меньшим числом строк не проверяются.',
+        )
+
+    @staticmethod
+    def should_explain(sql):
+        sql = sql.lstrip().upper()
+        # COUNT(*) постраничной пагинации считает все подходящие строки по
+        # определению, для больших списков предназначена курсорная
+        # пагинация. Условия страницы проверяются в запросе самой страницы.
+        return sql.startswith('SELECT') and not sql.startswith(
+            'SELECT COUNT(*)'
+        )
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql, params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def find_full_scans(self, sql, params):
+        """Таблицы, которые план читает целиком.
+
+        В PostgreSQL не учитывается просмотр с условием, которое оставляет
+        большую часть строк: индекс такое чтение не ускорит.
+        """
+        if connection.vendor == 'sqlite':
+            return SQLITE_SCAN_PATTERN.findall(self.explain(sql, params))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0][0]['Plan']
+        return [
+            node['Relation Name'] for node in iter_plan_nodes(plan)
+            if node['Node Type'] == 'Seq Scan' and not (
+                'Filter' in node and node['Plan Rows'] >= (
+                    NON_SELECTIVE_SHARE
+                    * self.count_rows(node['Relation Name'])
+                )
+            )
+        ]
+
+    def count_rows(self, table):
+        if table not in self.sizes:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+                )
+                self.sizes[table] = cursor.fetchone()[0]
+        return self.sizes[table]
+
+    def handle(self, *args, **options):
+        if connection.vendor not in EXPLAIN_PREFIXES:
+            raise CommandError(
+                f'База данных {connection.vendor} не поддерживается.'
+            )
+        user = get_sample_user(options['user'])
+        context = get_sample_context(user)
+        if context is None:
+            raise CommandError(
+                'В базе нет рецептов, тегов или ингредиентов для проверки.'
+            )
+        tables = set(connection.introspection.table_names())
+        self.sizes, failures = {}, []
+        for path in get_endpoint_paths(context):
+            response, queries = capture_queries(path, user)
+            if response.status_code >= 400:
+                raise CommandError(f'{path}: ответ {response.status_code}')
+            for sql, params in queries:
+                if not self.should_explain(sql):
+                    continue
+                large_tables = sorted({
+                    table for table in self.find_full_scans(sql, params)
+                    if table in tables
+                    and self.count_rows(table) >= options['min_rows']
+                })
+                if large_tables:
+                    failures.append(path)
+                    self.stderr.write(
+                        f'{path}: полное чтение {", ".join(large_tables)}\n'
+                        f'{sql}\n{self.explain(sql, params)}\n'
+                    )
+            self.stdout.write(f'{path}: запросов {len(queries)}')
+        if failures:
+            raise CommandError(
+                f'Полное чтение больших таблиц в {len(set(failures))} '
+                f'эндпоинтах.'
+            )
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке.'))
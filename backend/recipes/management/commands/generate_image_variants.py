@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_image_variants, save_image_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт варианты изображений для рецептов, у которых они '
+        'отсутствуют или устарели.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать варианты для всех рецептов.',
+        )
+
+    def handle(self, *args, **options):
+        created = failed = 0
+        recipes = Recipe.objects.exclude(image='').only(
+            'id', 'image', 'image_variants'
+        )
+        for recipe in recipes.iterator():
+            if not options['all'] and (
+                recipe.image_variants.get('source') == recipe.image.name
+            ):
+                continue
+            try:
+                variants = build_image_variants(recipe.image.name)
+            except (OSError, ValueError) as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe.id}: {error}')
+                continue
+            save_image_variants(recipe.pk, recipe.image.name, variants)
+            created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {created}, ошибок: {failed}'
+        ))
@@ -0,0 +1,265 @@
+import io
+import itertools
+import random
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from PIL import Image
+
+from favorites.models import Favorite
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe
+from recipes.search import is_full_text_search_supported
+from shoppingcarts.models import ShoppingCart
+from tags.models import Tag
+from users.models import Subscription
+
+User = get_user_model()
+
+PLACEHOLDER_IMAGE = 'recipes/images/load-placeholder.jpg'
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+WORDS = (
+    'суп', 'салат', 'пирог', 'каша', 'рагу', 'запеканка', 'омлет',
+    'паста', 'котлеты', 'плов', 'блины', 'соус', 'десерт', 'хлеб',
+    'томатный', 'грибной', 'куриный', 'овощной', 'сырный', 'ягодный',
+    'домашний', 'быстрый', 'праздничный', 'летний', 'острый', 'сладкий',
+)
+
+
+def zipf_weights(count, exponent):
+    """Кумулятивные веса закона Ципфа для random.choices."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт синтетических пользователей, рецепты, избранное, списки '
+        'покупок и подписки с распределением по степенному закону.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее число рецептов в избранном пользователя.',
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее число рецептов в списке покупок пользователя.',
+        )
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее число подписок пользователя.',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель степени закона Ципфа для популярности.',
+        )
+        parser.add_argument('--seed', type=int, help='Зерно генератора.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.skew = options['skew']
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                'Сначала загрузите ингредиенты: manage.py loaddata data.json'
+            )
+        self.random.shuffle(ingredient_ids)
+        tag_ids = self.get_tag_ids()
+        self.ensure_placeholder_image()
+
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(user_ids, options['recipes'])
+        self.create_recipe_relations(recipe_ids, ingredient_ids, tag_ids)
+        all_recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        self.random.shuffle(all_recipe_ids)
+        for model, average in (
+            (Favorite, options['favorites']),
+            (ShoppingCart, options['carts']),
+        ):
+            self.create_user_recipes(
+                model, user_ids, all_recipe_ids, average
+            )
+        self.create_subscriptions(user_ids, options['subscriptions'])
+
+        # bulk_create не отправляет сигналы, поэтому производные данные
+        # пересчитываются штатными командами.
+        call_command('recount_counters', verbosity=0)
+        call_command('check_ingredient_snapshots', fix=True, verbosity=0)
+        call_command('rebuild_shopping_lists', verbosity=0)
+        if is_full_text_search_supported():
+            call_command('update_search_vectors', verbosity=0)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, '
+            f'рецептов: {len(recipe_ids)}'
+        ))
+
+    def get_tag_ids(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def ensure_placeholder_image(self):
+        if default_storage.exists(PLACEHOLDER_IMAGE):
+            return
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 480), '#E26C2D').save(buffer, 'JPEG')
+        default_storage.save(PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+
+    def sample(self, population, cum_weights, count):
+        """До count различных элементов с учётом весов популярности."""
+        if count <= 0:
+            return set()
+        return set(self.random.choices(
+            population, cum_weights=cum_weights, k=count
+        ))
+
+    def skewed_count(self, average):
+        """Количество по распределению Парето со средним около average."""
+        alpha = 2.0
+        scale = average * (alpha - 1) / alpha
+        return int(scale * self.random.paretovariate(alpha))
+
+    def create_users(self, count):
+        prefix = f'load_{secrets.token_hex(3)}'
+        password = make_password(None)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{prefix}_{number}',
+                    email=f'{prefix}_{number}@example.com',
+                    first_name='Пользователь',
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        # SQLite не возвращает id из bulk_create, поэтому они читаются
+        # заново по префиксу имени.
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, author_ids, count):
+        if not author_ids:
+            return []
+        weights = zipf_weights(len(author_ids), self.skew)
+        now = timezone.now()
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=self.random.choices(
+                        author_ids, cum_weights=weights
+                    )[0],
+                    name=' '.join(self.random.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(self.random.choices(WORDS, k=40)),
+                    cooking_time=self.random.randint(5, 180),
+                    image=PLACEHOLDER_IMAGE,
+                )
+                for _ in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=author_ids
+        ).order_by('id').values_list('id', flat=True))
+        # pub_date заполняется auto_now_add, поэтому даты публикаций
+        # разносятся по последнему году отдельным обновлением.
+        dates = sorted(
+            now - timedelta(minutes=self.random.randint(0, 525600))
+            for _ in recipe_ids
+        )
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, pub_date=date, updated_at=date)
+                for recipe_id, date in zip(recipe_ids, dates)
+            ],
+            ['pub_date', 'updated_at'],
+            batch_size=self.batch_size,
+        )
+        return recipe_ids
+
+    def create_recipe_relations(self, recipe_ids, ingredient_ids, tag_ids):
+        weights = zipf_weights(len(ingredient_ids), self.skew)
+        recipe_tags = Recipe.tags.through
+        ingredients, tags = [], []
+        for recipe_id in recipe_ids:
+            picked = self.sample(
+                ingredient_ids, weights, self.random.randint(3, 12)
+            )
+            ingredients.extend(
+                IngredientRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for ingredient_id in picked
+            )
+            tags.extend(
+                recipe_tags(recipe_id=recipe_id, tag_id=tag_id)
+                for tag_id in self.random.sample(
+                    tag_ids, self.random.randint(1, len(tag_ids))
+                )
+            )
+        IngredientRecipe.objects.bulk_create(
+            ingredients, batch_size=self.batch_size
+        )
+        recipe_tags.objects.bulk_create(tags, batch_size=self.batch_size)
+
+    def create_user_recipes(self, model, user_ids, recipe_ids, average):
+        weights = zipf_weights(len(recipe_ids), self.skew)
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in self.sample(
+                    recipe_ids, weights, self.skewed_count(average)
+                )
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+
+    def create_subscriptions(self, user_ids, average):
+        author_ids = list(Recipe.objects.order_by().values_list(
+            'author_id', flat=True
+        ).distinct())
+        if not author_ids:
+            return
+        self.random.shuffle(author_ids)
+        weights = zipf_weights(len(author_ids), self.skew)
+        Subscription.objects.bulk_create(
+            (
+                Subscription(user_id=user_id, following_id=author_id)
+                for user_id in user_ids
+                for author_id in self.sample(
+                    author_ids, weights, self.skewed_count(average)
+                )
+                if author_id != user_id
+            ),
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
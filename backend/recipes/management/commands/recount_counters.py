@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from favorites.models import Favorite
+from recipes.counters import recount_recipe_counters, recount_user_counters
+from recipes.models import Recipe
+from shoppingcarts.models import ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики избранного, списков покупок, рецептов и '
+        'подписчиков пакетами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество объектов в одном пакете.',
+        )
+
+    def recount(self, model, recount, batch_size):
+        ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            with transaction.atomic():
+                recount(model.objects.filter(pk__in=batch))
+        return len(ids)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        recipes = self.recount(
+            Recipe,
+            lambda recipes: recount_recipe_counters(
+                recipes, Favorite, ShoppingCart
+            ),
+            batch_size,
+        )
+        users = self.recount(
+            User,
+            lambda users: recount_user_counters(users, Recipe, Subscription),
+            batch_size,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, пользователей: {users}'
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.search import is_full_text_search_supported, update_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Заполняет поисковые векторы рецептов пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество рецептов в одном пакете.',
+        )
+
+    def handle(self, *args, **options):
+        if not is_full_text_search_supported():
+            raise CommandError(
+                'Полнотекстовый поиск доступен только в PostgreSQL.'
+            )
+        batch_size = options['batch_size']
+        recipe_ids = list(
+            Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        for start in range(0, len(recipe_ids), batch_size):
+            update_search_vector(recipe_ids[start:start + batch_size])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено рецептов: {len(recipe_ids)}')
+        )
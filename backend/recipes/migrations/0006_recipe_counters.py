@@ -0,0 +1,52 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_recipe_rows(model):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(
+                recipe=models.OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=models.Count('pk')
+            ).values('total'),
+            output_field=models.IntegerField(),
+        ),
+        models.Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    apps.get_model('recipes', 'Recipe').objects.update(
+        favorites_count=count_recipe_rows(
+            apps.get_model('favorites', 'Favorite')
+        ),
+        in_carts_count=count_recipe_rows(
+            apps.get_model('shoppingcarts', 'ShoppingCart')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_pub_date_id_idx'),
+        ('favorites', '0003_initial'),
+        ('shoppingcarts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлено в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Добавлено в списки покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
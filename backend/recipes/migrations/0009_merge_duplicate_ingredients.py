@@ -0,0 +1,33 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = IngredientRecipe.objects.values(
+        'recipe_id', 'ingredient_id'
+    ).annotate(
+        count=models.Count('id'), total=models.Sum('amount')
+    ).filter(count__gt=1).order_by()
+    for duplicate in duplicates.iterator():
+        rows = IngredientRecipe.objects.filter(
+            recipe_id=duplicate['recipe_id'],
+            ingredient_id=duplicate['ingredient_id'],
+        ).order_by('id')
+        kept_id = rows.values_list('id', flat=True)[0]
+        rows.exclude(id=kept_id).delete()
+        rows.filter(id=kept_id).update(amount=duplicate['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
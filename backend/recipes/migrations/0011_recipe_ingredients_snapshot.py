@@ -0,0 +1,59 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:21
+
+from django.db import migrations, models
+
+
+def build_snapshots(IngredientRecipe, recipe_ids):
+    snapshots = {recipe_id: [] for recipe_id in recipe_ids}
+    rows = IngredientRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('id').values_list(
+        'recipe_id',
+        'ingredient_id',
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount',
+    )
+    for recipe_id, ingredient_id, name, measurement_unit, amount in rows:
+        snapshots[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        })
+    return snapshots
+
+
+def fill_snapshots(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    recipe_ids = list(
+        Recipe.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    for start in range(0, len(recipe_ids), 1000):
+        snapshots = build_snapshots(
+            IngredientRecipe, recipe_ids[start:start + 1000]
+        )
+        Recipe.objects.bulk_update(
+            [
+                Recipe(pk=recipe_id, ingredients_snapshot=snapshot)
+                for recipe_id, snapshot in snapshots.items()
+            ],
+            ['ingredients_snapshot'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_ingredientrecipe_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredients_snapshot',
+            field=models.JSONField(default=list, editable=False, verbose_name='Снимок ингредиентов'),
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
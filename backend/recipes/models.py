@@ -1,15 +1,23 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
 from ingredients.models import Ingredient
 from tags.models import Tag
 
+from .counters import get_update_fields
+
 User = get_user_model()
 
 
 class Recipe(models.Model):
     """Модель рецептов."""
+    COUNTER_FIELDS = ('favorites_count', 'in_carts_count')
+    # Поля, которые полный save() не перезаписывает.
+    DERIVED_FIELDS = COUNTER_FIELDS + ('ingredients_snapshot',)
+
     name = models.CharField(
         max_length=200,
         verbose_name='Название рецепта'
@@ -18,6 +26,11 @@ class Recipe(models.Model):
         upload_to='recipes/images/',
         verbose_name='Изображение'
     )
+    image_variants = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name='Варианты изображения'
+    )
     author = models.ForeignKey(
         User, related_name='recipes',
         on_delete=models.CASCADE,
@@ -32,6 +45,11 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name='Ингредиенты'
     )
+    ingredients_snapshot = models.JSONField(
+        default=list,
+        editable=False,
+        verbose_name='Снимок ингредиентов'
+    )
     tags = models.ManyToManyField(
         Tag,
         related_name='recipes',
@@ -49,15 +67,56 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавлено в избранное'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Добавлено в списки покупок'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if not force_insert:
+            update_fields = get_update_fields(
+                self, self.DERIVED_FIELDS, update_fields
+            )
+        super().save(force_insert, force_update, using, update_fields)
+
 
 class IngredientRecipe(models.Model):
     """Модель ингредиент/рецепт."""
@@ -83,6 +142,12 @@ class IngredientRecipe(models.Model):
     class Meta:
         verbose_name = 'Ингредиенты в рецепте'
         verbose_name_plural = 'Ингредиенты в рецептах'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'ingredient'),
+                name='unique_ingredient_recipe'
+            ),
+        )
 
     def __str__(self):
         return (
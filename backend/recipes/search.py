@@ -0,0 +1,59 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import IngredientRecipe, Recipe
+
+SEARCH_CONFIG = 'russian'
+
+
+def is_full_text_search_supported():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(recipe_ids):
+    """Пересчитывает поисковый вектор для рецептов с указанными id.
+
+    Название рецепта имеет наибольший вес, затем описание и названия
+    ингредиентов. Вне PostgreSQL вектор не поддерживается.
+    """
+    if not is_full_text_search_supported():
+        return
+    ingredient_names = IngredientRecipe.objects.filter(
+        recipe=OuterRef('pk')
+    ).values('recipe').annotate(
+        names=StringAgg('ingredient__name', delimiter=' ')
+    ).values('names')
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        search_vector=(
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(
+                Coalesce(Subquery(ingredient_names), Value('')),
+                weight='C',
+                config=SEARCH_CONFIG,
+            )
+        )
+    )
+
+
+def search_recipes(queryset, value):
+    """Фильтрует рецепты по поисковой строке, сортируя по релевантности.
+
+    В PostgreSQL используется полнотекстовый поиск по индексу, в
+    остальных СУБД (например, SQLite при локальной разработке) поиск
+    подстроки в названии, описании и ингредиентах.
+    """
+    if not is_full_text_search_supported():
+        return queryset.filter(
+            Q(name__icontains=value)
+            | Q(text__icontains=value)
+            | Q(ingredients__name__icontains=value)
+        ).distinct()
+    query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-pub_date')
@@ -0,0 +1,154 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from ingredients.models import Ingredient
+from tags.models import Tag
+
+from .images import schedule_image_variants
+from .models import IngredientRecipe, Recipe
+from .search import update_search_vector
+from .snapshots import update_ingredient_snapshots
+
+User = get_user_model()
+
+AUTHOR_FIELDS = {'email', 'username', 'first_name', 'last_name'}
+
+# id рецептов, ингредиенты которых в текущем потоке меняются целиком, и
+# удаляемых авторов: обработчики не срабатывают на каждую строку каскада.
+skipped = threading.local()
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    update_search_vector([instance.pk])
+
+
+@receiver(post_save, sender=Recipe)
+def create_image_variants(sender, instance, **kwargs):
+    transaction.on_commit(lambda: schedule_image_variants(instance))
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        User.objects.filter(pk=instance.author_id).update(
+            recipes_count=F('recipes_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(sender, instance, **kwargs):
+    if instance.author_id in get_skipped_author_ids():
+        return
+    User.objects.filter(
+        pk=instance.author_id, recipes_count__gt=0
+    ).update(recipes_count=F('recipes_count') - 1)
+
+
+def get_skipped_ids(name):
+    if not hasattr(skipped, name):
+        setattr(skipped, name, set())
+    return getattr(skipped, name)
+
+
+def get_skipped_recipe_ids():
+    return get_skipped_ids('recipe_ids')
+
+
+def get_skipped_author_ids():
+    return get_skipped_ids('author_ids')
+
+
+@contextmanager
+def skip_ids(name, ids):
+    """Снимает id с учёта при выходе из блока, в том числе при ошибке."""
+    ids = set(ids) - get_skipped_ids(name)
+    get_skipped_ids(name).update(ids)
+    try:
+        yield
+    finally:
+        get_skipped_ids(name).difference_update(ids)
+
+
+def skip_ingredient_touch(recipe_ids):
+    """Не обновляет рецепты после изменения отдельных ингредиентов.
+
+    Используется при удалении рецептов и замене их ингредиентов.
+    """
+    return skip_ids('recipe_ids', recipe_ids)
+
+
+def skip_recipes_count(author_ids):
+    """Не уменьшает счётчик рецептов удаляемых вместе с рецептами авторов."""
+    return skip_ids('author_ids', author_ids)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def touch_ingredient_recipe(sender, instance, **kwargs):
+    if instance.recipe_id in get_skipped_recipe_ids():
+        return
+    update_ingredient_snapshots([instance.recipe_id])
+    update_search_vector([instance.recipe_id])
+
+
+def touch_recipes_with_ingredients(ingredient_ids):
+    """Обновляет рецепты с ингредиентами после их переименования.
+
+    Меняются updated_at, снимки ингредиентов и поисковые векторы.
+    """
+    recipe_ids = list(
+        IngredientRecipe.objects.filter(
+            ingredient_id__in=ingredient_ids
+        ).values_list('recipe_id', flat=True).distinct()
+    )
+    update_ingredient_snapshots(recipe_ids)
+    update_search_vector(recipe_ids)
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes_with_ingredients([instance.pk])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif pk_set:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    else:
+        return
+    recipes.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created, update_fields, **kwargs):
+    # Данные автора входят в представление рецепта, но вход пользователя
+    # меняет только last_login и рецепты не затрагивает.
+    if created or (
+        update_fields and not set(update_fields) & AUTHOR_FIELDS
+    ):
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+def touch_tag_recipes(sender, instance, created, **kwargs):
+    if not created:
+        instance.recipes.update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Tag)
+def touch_deleted_tag_recipes(sender, instance, **kwargs):
+    instance.recipes.update(updated_at=timezone.now())
@@ -0,0 +1,49 @@
+from django.utils import timezone
+
+from .models import IngredientRecipe, Recipe
+
+
+def build_ingredient_snapshots(recipe_ids):
+    """Собирает списки ингредиентов рецептов одним запросом.
+
+    Возвращает словарь {id рецепта: [{id, name, measurement_unit,
+    amount}]} в порядке добавления ингредиентов в рецепт.
+    """
+    snapshots = {recipe_id: [] for recipe_id in recipe_ids}
+    rows = IngredientRecipe.objects.filter(
+        recipe_id__in=snapshots
+    ).order_by('id').values_list(
+        'recipe_id',
+        'ingredient_id',
+        'ingredient__name',
+        'ingredient__measurement_unit',
+        'amount',
+    )
+    for recipe_id, ingredient_id, name, measurement_unit, amount in rows:
+        snapshots[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount,
+        })
+    return snapshots
+
+
+def update_ingredient_snapshots(recipe_ids):
+    """Перезаписывает снимки ингредиентов рецептов и возвращает их.
+
+    Меняется и updated_at: по нему строятся ETag и ключ кеша рецепта.
+    """
+    snapshots = build_ingredient_snapshots(recipe_ids)
+    now = timezone.now()
+    Recipe.objects.bulk_update(
+        [
+            Recipe(
+                pk=recipe_id, ingredients_snapshot=snapshot, updated_at=now
+            )
+            for recipe_id, snapshot in snapshots.items()
+        ],
+        ['ingredients_snapshot', 'updated_at'],
+        batch_size=500,
+    )
+    return snapshots
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.models import IngredientRecipe, Recipe
+from tags.models import Tag
+
+User = get_user_model()
+
+
+def create_user(username, password='pass', **fields):
+    fields.setdefault('first_name', 'Имя')
+    fields.setdefault('last_name', 'Фамилия')
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password=password, **fields
+    )
+
+
+def create_recipe(author, name='Блины', tags=(), ingredients=()):
+    """Рецепт с тегами и парами (ингредиент, количество)."""
+    recipe = Recipe.objects.create(
+        author=author, name=name, text='Текст', cooking_time=10,
+        image='recipes/images/test.jpg',
+    )
+    if tags:
+        recipe.tags.set(tags)
+    for ingredient, amount in ingredients:
+        IngredientRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
+
+
+def get_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+class RecipeTestCase(TestCase):
+    """Автор рецептов, пользователь, тег и ингредиент."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(
+            'author', first_name='Автор', last_name='Рецептов'
+        )
+        cls.user = create_user('user', first_name='Иван', last_name='Иванов')
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+
+    @classmethod
+    def create_recipe(cls, name='Блины', amount=100):
+        """Рецепт автора с общим тегом и ингредиентом."""
+        return create_recipe(
+            cls.author, name, [cls.tag], [(cls.ingredient, amount)]
+        )
+
+    def setUp(self):
+        self.client = get_client(self.user)
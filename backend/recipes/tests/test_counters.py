@@ -0,0 +1,152 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from favorites.models import Favorite
+from recipes.models import Recipe
+from recipes.tests.base import (RecipeTestCase, create_recipe, create_user,
+                                get_client)
+from shoppingcarts.models import ShoppingCart, ShoppingListItem
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class CountersTests(RecipeTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.recipe = cls.create_recipe()
+
+    def setUp(self):
+        super().setUp()
+        self.author_client = get_client(self.author)
+
+    def refresh(self, obj):
+        obj.refresh_from_db()
+        return obj
+
+    def test_favorite_and_cart_endpoints_update_counters(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.post(url + 'favorite/')
+        self.client.post(url + 'shopping_cart/')
+        recipe = self.refresh(self.recipe)
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.in_carts_count, 1)
+
+        self.client.delete(url + 'favorite/')
+        self.client.delete(url + 'shopping_cart/')
+        recipe = self.refresh(self.recipe)
+        self.assertEqual(recipe.favorites_count, 0)
+        self.assertEqual(recipe.in_carts_count, 0)
+
+    def test_full_save_keeps_recipe_counters(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        recipe.name = 'Оладьи'
+        recipe.save()
+        recipe = self.refresh(recipe)
+        self.assertEqual(recipe.name, 'Оладьи')
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.in_carts_count, 1)
+
+    def test_recipe_patch_keeps_counters(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = self.author_client.patch(
+            f'/api/recipes/{self.recipe.id}/',
+            {'name': 'Оладьи', 'tags': [self.tag.id]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.refresh(self.recipe).favorites_count, 1)
+
+    def test_full_save_keeps_user_counters(self):
+        author = User.objects.get(pk=self.author.pk)
+        Subscription.objects.create(user=self.user, following=self.author)
+        author.set_password('new-pass')
+        author.save()
+        author = self.refresh(author)
+        self.assertTrue(author.check_password('new-pass'))
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.recipes_count, 1)
+
+    def test_subscribe_endpoint_updates_followers_count(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.refresh(self.author).followers_count, 1)
+        self.client.delete(url)
+        self.assertEqual(self.refresh(self.author).followers_count, 0)
+
+    def test_explicit_update_fields_are_kept(self):
+        Recipe.objects.filter(pk=self.recipe.pk).update(favorites_count=5)
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        recipe.favorites_count = 2
+        recipe.save(update_fields=['favorites_count'])
+        self.assertEqual(self.refresh(recipe).favorites_count, 2)
+
+    def test_deleting_user_updates_counters_and_shopping_lists(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.post(url + 'favorite/')
+        self.client.post(url + 'shopping_cart/')
+        self.author_client.post(url + 'shopping_cart/')
+
+        response = self.client.delete(
+            '/api/users/me/', {'current_password': 'pass'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        recipe = self.refresh(self.recipe)
+        self.assertEqual(recipe.favorites_count, 0)
+        self.assertEqual(recipe.in_carts_count, 1)
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.author).amount, 100
+        )
+
+    def test_deleting_recipe_updates_shopping_lists(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        self.client.post(url + 'favorite/')
+        self.client.post(url + 'shopping_cart/')
+
+        response = self.author_client.delete(url)
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Favorite.objects.exists())
+        self.assertFalse(ShoppingCart.objects.exists())
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_deleting_user_updates_followers_count(self):
+        Subscription.objects.create(user=self.user, following=self.author)
+        Subscription.objects.create(user=self.author, following=self.user)
+
+        response = self.client.delete(
+            '/api/users/me/', {'current_password': 'pass'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refresh(self.author).followers_count, 0)
+        self.assertFalse(Subscription.objects.exists())
+
+    def delete_author_with_recipes(self, username, count):
+        author = create_user(username)
+        for number in range(count):
+            recipe = create_recipe(
+                author, f'Рецепт {number}', [self.tag],
+                [(self.ingredient, 100)],
+            )
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        client = get_client(author)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.delete(
+                '/api/users/me/', {'current_password': 'pass'}, format='json'
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Recipe.objects.filter(author_id=author.pk).exists())
+        return len(queries)
+
+    def test_deleting_user_queries_do_not_depend_on_recipes(self):
+        self.assertEqual(
+            self.delete_author_with_recipes('first', 1),
+            self.delete_author_with_recipes('second', 6),
+        )
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from PIL import Image
+
+from recipes.images import (build_image_variants, generate_image_variants,
+                            save_image_variants)
+from recipes.models import Recipe
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def save_image(name):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'JPEG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def variant_files(variants):
+    return [path for name, path in variants.items() if name != 'source']
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, RECIPE_IMAGE_ASYNC=False)
+class ImageVariantsTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass'
+        )
+        self.recipe = Recipe.objects.create(
+            author=author, name='Блины', text='Текст', cooking_time=10,
+            image=save_image('recipes/images/first.jpg'),
+        )
+
+    def get_variants(self):
+        self.recipe.refresh_from_db()
+        return self.recipe.image_variants
+
+    def test_image_change_deletes_previous_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_image_variants(self.recipe.pk)
+        old = self.get_variants()
+        self.assertTrue(all(map(default_storage.exists, variant_files(old))))
+
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image=save_image('recipes/images/second.jpg')
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_image_variants(self.recipe.pk)
+        new = self.get_variants()
+        self.assertEqual(new['source'], 'recipes/images/second.jpg')
+        self.assertTrue(all(map(default_storage.exists, variant_files(new))))
+        self.assertFalse(any(map(default_storage.exists, variant_files(old))))
+
+    def test_outdated_variants_are_discarded(self):
+        variants = build_image_variants(self.recipe.image.name)
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image=save_image('recipes/images/second.jpg')
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            save_image_variants(
+                self.recipe.pk, 'recipes/images/first.jpg', variants
+            )
+        self.assertEqual(self.get_variants(), {})
+        self.assertFalse(
+            any(map(default_storage.exists, variant_files(variants)))
+        )
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+@skipUnless(
+    connection.vendor == 'postgresql',
+    'Планы проверяются на статистике PostgreSQL',
+)
+class QueryPlansTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.TemporaryDirectory()
+        cls.settings_override = override_settings(
+            MEDIA_ROOT=cls.media_root.name
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        cls.media_root.cleanup()
+
+    @classmethod
+    def setUpTestData(cls):
+        output = io.StringIO()
+        call_command(
+            'loaddata', os.path.join(settings.BASE_DIR, 'data.json'),
+            verbosity=0,
+        )
+        call_command(
+            'generate_load_data', users=300, recipes=3000, seed=1,
+            stdout=output,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_hot_endpoints_do_not_scan_large_tables(self):
+        output = io.StringIO()
+
+        # Каталог ингредиентов из data.json (около 2200 строк) небольшой и
+        # целиком читается индексом поиска, рецепты и связи больше порога.
+        call_command('check_query_plans', min_rows=2500, stdout=output)
+
+        self.assertIn('Планы запросов в порядке.', output.getvalue())
+
+    def test_missing_index_is_reported(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX recipe_pub_date_id_idx')
+            cursor.execute('ANALYZE recipes_recipe')
+        errors = io.StringIO()
+
+        with self.assertRaises(CommandError):
+            call_command(
+                'check_query_plans', min_rows=2500, stdout=io.StringIO(),
+                stderr=errors,
+            )
+
+        self.assertIn('полное чтение recipes_recipe', errors.getvalue())
@@ -0,0 +1,107 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+
+from ingredients.models import Ingredient
+from recipes import signals
+from recipes.models import IngredientRecipe, Recipe
+from recipes.tests.base import RecipeTestCase, create_recipe, get_client
+
+
+class IngredientSnapshotTests(RecipeTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.flour = cls.ingredient
+        cls.milk, cls.eggs = (
+            Ingredient.objects.create(name=name, measurement_unit=unit)
+            for name, unit in (('молоко', 'мл'), ('яйца', 'шт'))
+        )
+
+    def setUp(self):
+        self.client = get_client(self.author)
+        self.recipe = create_recipe(
+            self.author, tags=[self.tag],
+            ingredients=[(self.flour, 100), (self.milk, 200)],
+        )
+
+    def snapshot(self):
+        self.recipe.refresh_from_db()
+        return [
+            (item['name'], item['amount'])
+            for item in self.recipe.ingredients_snapshot
+        ]
+
+    def test_ingredient_rows_update_snapshot(self):
+        self.assertEqual(self.snapshot(), [('мука', 100), ('молоко', 200)])
+
+        IngredientRecipe.objects.filter(ingredient=self.milk).delete()
+
+        self.assertEqual(self.snapshot(), [('мука', 100)])
+
+    def test_full_save_keeps_snapshot(self):
+        stale = Recipe.objects.get(pk=self.recipe.pk)
+        IngredientRecipe.objects.create(
+            recipe=self.recipe, ingredient=self.eggs, amount=2
+        )
+
+        stale.name = 'Оладьи'
+        stale.save()
+
+        self.assertEqual(
+            self.snapshot(), [('мука', 100), ('молоко', 200), ('яйца', 2)]
+        )
+
+    def test_update_touches_recipe_once(self):
+        with mock.patch.object(
+            signals, 'update_ingredient_snapshots',
+            wraps=signals.update_ingredient_snapshots,
+        ) as touched:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.pk}/',
+                {'ingredients': [{'id': self.eggs.pk, 'amount': 3}]},
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        touched.assert_not_called()
+        self.assertEqual(self.snapshot(), [('яйца', 3)])
+        self.assertEqual(signals.get_skipped_recipe_ids(), set())
+
+    def test_failed_delete_does_not_leave_recipe_skipped(self):
+        with self.assertRaises(RuntimeError):
+            with signals.skip_ingredient_touch([self.recipe.pk]):
+                raise RuntimeError
+
+        self.assertEqual(signals.get_skipped_recipe_ids(), set())
+        IngredientRecipe.objects.filter(ingredient=self.milk).delete()
+        self.assertEqual(self.snapshot(), [('мука', 100)])
+
+    def test_delete_recipe(self):
+        response = self.client.delete(f'/api/recipes/{self.recipe.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(IngredientRecipe.objects.exists())
+        self.assertEqual(signals.get_skipped_recipe_ids(), set())
+
+    def test_fix_command_invalidates_cached_recipe(self):
+        cache.clear()
+        url = f'/api/recipes/{self.recipe.pk}/'
+        etag = self.client.get(url)['ETag']
+        IngredientRecipe.objects.filter(ingredient=self.milk).update(
+            amount=999
+        )
+
+        call_command(
+            'check_ingredient_snapshots', fix=True, stdout=io.StringIO()
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['amount'] for item in response.json()['ingredients']],
+            [100, 999],
+        )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import ShoppingCart
+from .models import ShoppingCart, ShoppingListItem
 
 
 @admin.register(ShoppingCart)
@@ -9,3 +9,12 @@ class ShoppingCartAdmin(admin.ModelAdmin):
         'user',
         'recipe'
     )
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'ingredient',
+        'amount'
+    )
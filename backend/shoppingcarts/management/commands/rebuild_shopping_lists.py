@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shoppingcarts.shopping_lists import rebuild_shopping_lists
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Заново собирает сводные списки покупок пользователей пакетами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество пользователей в одном пакете.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            with transaction.atomic():
+                rebuild_shopping_lists(ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано списков покупок: {len(ids)}'
+        ))
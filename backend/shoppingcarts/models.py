@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from ingredients.models import Ingredient
 from recipes.models import Recipe
 
 User = get_user_model()
@@ -34,3 +35,41 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'Рецепт "{self.recipe}" в списке покупок у {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    """Модель сводного списка покупок пользователя.
+
+    Хранит суммарное количество каждого ингредиента по всем рецептам из
+    списка покупок и обновляется при изменении списка и рецептов в нём.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    amount = models.IntegerField(
+        default=0,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списках покупок'
+
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.ingredient} - {self.amount} у {self.user}'
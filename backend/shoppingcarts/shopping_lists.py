@@ -0,0 +1,72 @@
+from django.db import connection
+
+from recipes.models import IngredientRecipe
+
+from .models import ShoppingCart, ShoppingListItem
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def _add_cart_ingredients(where, params, delta):
+    """Прибавляет к спискам покупок ингредиенты отобранных строк корзины.
+
+    Пересчёт выполняется одним INSERT ... SELECT ... ON CONFLICT без
+    загрузки строк в Python.
+    """
+    quote = connection.ops.quote_name
+    list_table = quote(ShoppingListItem._meta.db_table)
+    cart_table = quote(ShoppingCart._meta.db_table)
+    item_table = quote(IngredientRecipe._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {list_table} (user_id, ingredient_id, amount) '
+            f'SELECT cart.user_id, item.ingredient_id, %s * SUM(item.amount) '
+            f'FROM {cart_table} AS cart '
+            f'INNER JOIN {item_table} AS item '
+            f'ON item.recipe_id = cart.recipe_id '
+            f'WHERE {where} '
+            f'GROUP BY cart.user_id, item.ingredient_id '
+            f'ON CONFLICT (user_id, ingredient_id) '
+            f'DO UPDATE SET amount = {list_table}.amount + excluded.amount',
+            [delta, *params],
+        )
+
+
+def update_shopping_lists(recipe_ids, delta, user_id=None):
+    """Изменяет сводные списки покупок на ингредиенты рецептов.
+
+    Затрагиваются пользователи, у которых рецепты лежат в списке покупок,
+    либо только user_id. Поэтому при добавлении функция вызывается после
+    вставки строк корзины, а при удалении (delta=-1) — до их удаления.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    where = f'cart.recipe_id IN ({_placeholders(recipe_ids)})'
+    params = recipe_ids
+    if user_id is not None:
+        where += ' AND cart.user_id = %s'
+        params = [*recipe_ids, user_id]
+    _add_cart_ingredients(where, params, delta)
+    if delta < 0:
+        items = ShoppingListItem.objects.filter(amount__lte=0)
+        if user_id is not None:
+            items = items.filter(user_id=user_id)
+        else:
+            items = items.filter(
+                user__shopping_cart__recipe_id__in=recipe_ids
+            )
+        items.delete()
+
+
+def rebuild_shopping_lists(user_ids):
+    """Заново собирает сводные списки покупок пользователей."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+    _add_cart_ingredients(
+        f'cart.user_id IN ({_placeholders(user_ids)})', user_ids, 1
+    )
@@ -0,0 +1,31 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipes.models import Recipe
+
+from .models import ShoppingCart
+from .shopping_lists import update_shopping_lists
+
+
+@receiver(post_save, sender=ShoppingCart)
+def increase_in_carts_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            in_carts_count=F('in_carts_count') + 1
+        )
+        update_shopping_lists([instance.recipe_id], 1, instance.user_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    # Строка корзины ещё существует, поэтому ингредиенты рецепта можно
+    # вычесть тем же запросом, что и при добавлении.
+    update_shopping_lists([instance.recipe_id], -1, instance.user_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_in_carts_count(sender, instance, **kwargs):
+    Recipe.objects.filter(
+        pk=instance.recipe_id, in_carts_count__gt=0
+    ).update(in_carts_count=F('in_carts_count') - 1)
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:02
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, field):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(
+                **{field: models.OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=models.Count('pk')
+            ).values('total'),
+            output_field=models.IntegerField(),
+        ),
+        models.Value(0),
+    )
+
+
+def fill_counters(apps, schema_editor):
+    apps.get_model('users', 'CustomUser').objects.update(
+        recipes_count=count_rows(apps.get_model('recipes', 'Recipe'), 'author'),
+        followers_count=count_rows(
+            apps.get_model('users', 'Subscription'), 'following'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('recipes', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -2,12 +2,26 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
 
+from recipes.counters import get_update_fields
+
 
 class CustomUser(AbstractUser):
     """Модель пользователей с расширенным функционалом."""
+    COUNTER_FIELDS = ('recipes_count', 'followers_count')
+
     email = models.EmailField(unique=True, verbose_name='Электронная почта')
     first_name = models.CharField(max_length=30, verbose_name='Имя')
     last_name = models.CharField(max_length=30, verbose_name='Фамилия')
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -19,6 +33,14 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if not force_insert:
+            update_fields = get_update_fields(
+                self, self.COUNTER_FIELDS, update_fields
+            )
+        super().save(force_insert, force_update, using, update_fields)
+
     def clean(self):
         super().clean()
         if self.username == 'me':
@@ -54,6 +76,12 @@ class Subscription(models.Model):
                 name="unique_follow",
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', '-id'),
+                name='subscription_user_id_idx',
+            ),
+        )
 
     def clean(self):
         if self.user == self.following:
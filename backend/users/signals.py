@@ -0,0 +1,20 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomUser, Subscription
+
+
+@receiver(post_save, sender=Subscription)
+def increase_followers_count(sender, instance, created, **kwargs):
+    if created:
+        CustomUser.objects.filter(pk=instance.following_id).update(
+            followers_count=F('followers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Subscription)
+def decrease_followers_count(sender, instance, **kwargs):
+    CustomUser.objects.filter(
+        pk=instance.following_id, followers_count__gt=0
+    ).update(followers_count=F('followers_count') - 1)